@@ -0,0 +1,208 @@
+# Michael Craig, 000955248
+from app.workload_gen import generate_workload
+from app.csv_reader import load_package_csv, load_city_csv
+from app.classes.hub import Hub
+from app.classes.truck import Truck
+from app.main import run_day, mileage_estimate
+from app.rh_table import RobinHoodHashTable
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import tempfile
+import time
+
+
+DEFAULT_SIZES = [(27, 40), (60, 200), (120, 600)]  # (addresses, packages)
+TABLE_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+# Times each phase of a run on synthetic workloads of increasing size:
+#   load_packages   parsing the package file into the hash table
+#   load_city       parsing the distance table into the graph
+#   shortest_paths  all-pairs shortest paths (one dsp per address)
+#   plan            schedule_deliveries for a single truck carrying every package
+#   simulate        a full day of the event-driven simulation
+# Each phase is timed repeats times and the fastest run is kept. A size that cannot
+# be run records the error instead of timings, so the rest of the sweep still completes.
+# O(R * sum of run costs), where R = repeats
+def run_benchmark(sizes, special_share=0.25, seed=0, repeats=3, work_dir=None):
+    results = []
+    logging.disable(logging.CRITICAL)
+    try:
+        with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+            for num_addresses, num_packages in sizes:
+                distance_file = os.path.join(directory, 'distances_{}.csv'.format(num_addresses))
+                package_file = os.path.join(directory, 'packages_{}.csv'.format(num_packages))
+                generate_workload(distance_file, package_file, num_addresses, num_packages, special_share,
+                                  seed=seed)
+                result = {'addresses': num_addresses, 'packages': num_packages}
+                try:
+                    result.update(time_phases(distance_file, package_file, repeats))
+                except Exception as error:
+                    result['error'] = '{}: {}'.format(type(error).__name__, error)
+                results.append(result)
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+# Runs every phase repeats times on one workload; returns fastest time per phase in
+# seconds along with the outcome of the last simulation.
+# O(R * (L + A^3 log A + M*A + E log E)), see run_benchmark
+def time_phases(distance_file, package_file, repeats):
+    timings = {}
+    outcome = {}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pkg_lst = load_package_csv(package_file)
+        record_time(timings, 'load_packages', start)
+
+        start = time.perf_counter()
+        graph = load_city_csv(distance_file, precompute=False)
+        record_time(timings, 'load_city', start)
+
+        start = time.perf_counter()
+        graph.compute_shortest_paths()
+        record_time(timings, 'shortest_paths', start)
+
+        hub = Hub(graph)
+        hub.produce_packages(pkg_lst.get_all())
+        hub_vertex = graph.get_vertex('HUB')
+        truck = Truck(1, hub_vertex)
+        for package in hub.pkg_id_table.values():
+            truck.add_package(package)
+        start = time.perf_counter()
+        truck.schedule_deliveries(graph, hub_vertex, hub_vertex, 28800)
+        record_time(timings, 'plan', start)
+
+        start = time.perf_counter()
+        hub, trucks, _ = run_day(pkg_lst, graph, 86399)
+        record_time(timings, 'simulate', start)
+        outcome = {'packages_loaded': len(hub.pkg_id_table),
+                   'delivered': hub.store.status_count('Delivered'),
+                   'late': hub.store.late_count(),
+                   'mileage': round(mileage_estimate(trucks, 28800), 1)}
+    return {'seconds': timings, 'outcome': outcome}
+
+
+# Times the package hash table against dict for each number of packages:
+#   insert    adding every package tuple under its id
+#   get       looking up every id
+#   miss      membership tests for ids not in the table
+#   iterate   walking all values
+#   remove    removing every other id
+# Ids are shuffled so both tables see the same random insertion order. The fastest of
+# repeats runs is kept for each operation.
+# O(R * S), where R = repeats; S = sum of sizes
+def run_table_benchmark(sizes, seed=0, repeats=3):
+    results = []
+    for size in sizes:
+        rng = random.Random(seed)
+        ids = list(range(1, size + 1))
+        rng.shuffle(ids)
+        packages = [(p_id, 'address', 86399, 'city', 'UT', '84101', '1', '') for p_id in ids]
+        missing = [p_id + size for p_id in ids]
+        timings = {'dict': {}, 'robin_hood': {}}
+        for _ in range(repeats):
+            time_table_operations(timings['dict'], {}, packages, missing, dict_insert, dict.pop)
+            time_table_operations(timings['robin_hood'], RobinHoodHashTable(), packages, missing,
+                                  RobinHoodHashTable.insert, RobinHoodHashTable.remove)
+        results.append({'packages': size, 'seconds': timings})
+    return results
+
+
+# Runs each table operation once, keeping the fastest time for each in timings.
+# O(N), where N = number of packages
+def time_table_operations(timings, table, packages, missing, insert, remove):
+    start = time.perf_counter()
+    for package in packages:
+        insert(table, package[0], package)
+    record_time(timings, 'insert', start)
+
+    get = table.get
+    start = time.perf_counter()
+    for package in packages:
+        get(package[0])
+    record_time(timings, 'get', start)
+
+    start = time.perf_counter()
+    for p_id in missing:
+        p_id in table
+    record_time(timings, 'miss', start)
+
+    values = table.get_all if isinstance(table, RobinHoodHashTable) else table.values
+    start = time.perf_counter()
+    for _ in values():
+        pass
+    record_time(timings, 'iterate', start)
+
+    start = time.perf_counter()
+    for package in packages[::2]:
+        remove(table, package[0])
+    record_time(timings, 'remove', start)
+    return
+
+
+# Adds to dict the way RobinHoodHashTable.insert adds to the table.
+# O(1)
+def dict_insert(table, key, value):
+    table[key] = value
+    return
+
+
+# Keeps the fastest time seen for a phase.
+# O(1)
+def record_time(timings, phase, start):
+    elapsed = time.perf_counter() - start
+    if phase not in timings or elapsed < timings[phase]:
+        timings[phase] = round(elapsed, 6)
+    return
+
+
+# Writes benchmark results and the environment they were measured in to a JSON file.
+# O(S), where S = number of sizes
+def write_results(filename, results, special_share, seed, repeats, table_results=None):
+    report = {'python': platform.python_version(),
+              'platform': platform.platform(),
+              'special_share': special_share,
+              'seed': seed,
+              'repeats': repeats,
+              'results': results}
+    if table_results is not None:
+        report['tables'] = table_results
+    with open(filename, 'w') as file:
+        json.dump(report, file, indent=2)
+    return
+
+
+# Parses sizes given as ADDRESSESxPACKAGES, comma separated, e.g. "27x40,60x80".
+# O(S)
+def parse_sizes(text):
+    sizes = []
+    for size in text.split(','):
+        num_addresses, num_packages = size.lower().split('x')
+        sizes.append((int(num_addresses), int(num_packages)))
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time load, plan and simulation phases on synthetic workloads.')
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES,
+                        help='comma separated ADDRESSESxPACKAGES, e.g. 27x40,60x80')
+    parser.add_argument('--special-share', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--tables', action='store_true', help='also time the package hash table against dict')
+    parser.add_argument('--table-sizes', type=lambda text: [int(size) for size in text.split(',')],
+                        default=TABLE_SIZES, help='comma separated package counts for --tables')
+    args = parser.parse_args()
+    bench_results = run_benchmark(args.sizes, args.special_share, args.seed, args.repeats)
+    table_bench_results = None
+    if args.tables:
+        table_bench_results = run_table_benchmark(args.table_sizes, args.seed, args.repeats)
+    write_results(args.output, bench_results, args.special_share, args.seed, args.repeats, table_bench_results)
+    print(json.dumps({'results': bench_results, 'tables': table_bench_results}, indent=2))
@@ -1,21 +1,32 @@
 # Michael Craig, 000955248
+from app.trip_calc import all_pairs_shortest_paths, shortest_path_tree
+from collections import OrderedDict
 
 
 # Vertex for graph.
 class Address:
     def __init__(self, address):
         self.label = address
-        self.distance = float('inf')
-        self.predecessor = None
         self.arrival_time = 0
 
 
 # Graph data structure
+# Shortest paths are answered from an all-pairs matrix when one has been computed,
+# otherwise from a bounded least-recently-used cache of single-source trees.
 class City:
-    def __init__(self):
+    def __init__(self, route_cache_size=64):
         self.addresses = {}
         self.adjacency_lst = {}
         self.edge_weights = {}
+        self.vertices = []
+        self.vertex_index = {}
+        self.all_pairs = False
+        self.distance_matrix = None
+        self.predecessor_matrix = None
+        self.route_cache = OrderedDict()  # source vertex: (distance row, predecessor row)
+        self.route_cache_size = route_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     # Adds address object as key in a dictionary;
     # Value is list of other address objects.
@@ -24,6 +35,9 @@ class City:
         if isinstance(new_address, Address):
             self.adjacency_lst[new_address] = []
             self.addresses[new_address.label] = new_address
+            self.vertex_index[new_address] = len(self.vertices)
+            self.vertices.append(new_address)
+            self.clear_shortest_paths()
         else:
             raise ValueError('Unknown object %s' % new_address)
 
@@ -32,6 +46,7 @@ class City:
     def add_directed_road(self, from_address, to_address, weight=1.0):
         self.edge_weights[(from_address, to_address)] = weight
         self.adjacency_lst[from_address].append(to_address)
+        self.clear_shortest_paths()
 
     # Undirected road.
     # O(1)
@@ -51,3 +66,61 @@ class City:
     # O(1)
     def get_vertex(self, label):
         return self.addresses[label]
+
+    # Precomputes distance and predecessor matrices for every pair of addresses;
+    # row i holds the shortest path tree rooted at vertices[i]. The matrices are
+    # rebuilt on the next query after any change to the graph.
+    # O(N * E log N), where N = number of addresses; E = number of roads
+    def compute_shortest_paths(self):
+        self.all_pairs = True
+        self.distance_matrix, self.predecessor_matrix = all_pairs_shortest_paths(self)
+        self.route_cache.clear()
+        return
+
+    # Installs all-pairs matrices computed elsewhere (e.g. read from a distance cache);
+    # rows may be any sequence indexed by vertex index, such as memoryviews.
+    # O(1)
+    def load_shortest_paths(self, distance_matrix, predecessor_matrix):
+        self.all_pairs = True
+        self.distance_matrix = distance_matrix
+        self.predecessor_matrix = predecessor_matrix
+        self.route_cache.clear()
+        return
+
+    # Discards precomputed matrices and cached trees; called whenever the graph changes.
+    # O(1)
+    def clear_shortest_paths(self):
+        self.distance_matrix = None
+        self.predecessor_matrix = None
+        self.route_cache.clear()
+        return
+
+    # Returns distance and predecessor rows for paths leaving a vertex. Reads the
+    # all-pairs matrices when they are in use; otherwise solves the tree once and
+    # keeps it in the route cache, evicting the least recently used source when full.
+    # O(1) for a matrix row or cache hit; O(E log N) for a cache miss
+    def shortest_paths_from(self, vertex):
+        if self.all_pairs:
+            if self.distance_matrix is None:
+                self.compute_shortest_paths()
+            row = self.vertex_index[vertex]
+            return self.distance_matrix[row], self.predecessor_matrix[row]
+        route_cache = self.route_cache
+        if vertex in route_cache:
+            self.cache_hits += 1
+            route_cache.move_to_end(vertex)
+            return route_cache[vertex]
+        self.cache_misses += 1
+        tree = shortest_path_tree(self, vertex)
+        route_cache[vertex] = tree
+        if len(route_cache) > self.route_cache_size:
+            route_cache.popitem(last=False)
+        return tree
+
+    # Returns hit and miss counts along with current and maximum size of the route cache.
+    # O(1)
+    def cache_info(self):
+        return {'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self.route_cache),
+                'capacity': self.route_cache_size}
@@ -0,0 +1,45 @@
+# Michael Craig, 000955248
+import heapq
+
+
+# Event types; events sharing a timestamp are handled in this order.
+PACKAGE_RECEIPT = 0
+CORRECTION = 1
+ARRIVAL = 2
+TRUCK_RETURN = 3
+DISPATCH = 4
+EVENT_NAMES = {PACKAGE_RECEIPT: 'package_receipt',
+               CORRECTION: 'correction',
+               ARRIVAL: 'arrival',
+               TRUCK_RETURN: 'truck_return',
+               DISPATCH: 'dispatch'}
+
+
+# Priority queue of timestamped simulation events. Events are ordered by time, then
+# by type, then by insertion order so that runs are repeatable.
+class EventQueue:
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    # Adds event to queue.
+    # O(log N), where N = number of queued events
+    def push(self, time, event_type, payload=None):
+        heapq.heappush(self.heap, (time, event_type, self.count, payload))
+        self.count += 1
+        return
+
+    # Removes and returns the next event as (time, event_type, payload).
+    # O(log N)
+    def pop(self):
+        time, event_type, _, payload = heapq.heappop(self.heap)
+        return time, event_type, payload
+
+    # Getter for time of the next event.
+    # O(1)
+    def next_time(self):
+        return self.heap[0][0]
+
+    # O(1)
+    def __len__(self):
+        return len(self.heap)
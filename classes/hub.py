@@ -1,7 +1,11 @@
 # Michael Craig, 000955248
-from .package import Package
-from app.trip_calc import shortest_distance
+from .package_store import PackageStore
+from .package_pool import PackagePool
+from .package import status_code
+from app.rh_table import RobinHoodHashTable
+from app import profiling
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -10,24 +14,24 @@ logging.basicConfig(level=logging.INFO)
 # Primary data structure; houses all package information, including
 # tables for storing delivery addresses, specific statuses, as well
 # as the graph for determining available travel routes.
+# depot is the vertex the hub's trucks leave from and return to; the city's 'HUB'
+# address unless another is given.
 class Hub:
-    def __init__(self, graph):
+    def __init__(self, graph, depot=None):
         self.city_graph = graph
+        self.depot = graph.get_vertex('HUB') if depot is None else depot
         self.bundles = {}
         self.deliveries = {}
-        self.packages = []
-        self.pkg_id_table = {}
+        self.packages = PackagePool()
+        self.pkg_id_table = RobinHoodHashTable()
+        self.store = PackageStore(graph)  # also the status index, see process_package_states
         self.late_arrivals = {}
-        self.statuses = {"Delivered": [],
-                         "On truck": [],
-                         "At hub": [],
-                         "Bundling": [],
-                         "Bundled": [],
-                         "Preassigned": [],
-                         "Delayed": [],
-                         "Correction needed": []}
-
-    # Produces list of all packages from hash table for simulation to track progress.
+        self.preassigned = {}  # package: None, for every package restricted to one truck
+
+    # Produces list of all packages from hash table for simulation to track progress,
+    # filing each in the package table (pkg_id_table).
+    # Takes any iterable of package tuples, so rows can be streamed straight from
+    # csv_reader.read_package_rows without building a table first.
     # O(N)
     def produce_packages(self, tup_lst):
         for tup in tup_lst:
@@ -35,32 +39,28 @@ class Hub:
             address = self.city_graph.get_vertex(address)
             if address not in self.deliveries:
                 self.deliveries[address] = []
-            new_package = Package(p_id, address, deadline, city, state, p_zip, weight, note)
+            new_package = self.store.add(p_id, address, deadline, city, state, p_zip, weight, note)
+            self.pkg_id_table.insert(p_id, new_package)
             self.deliveries[address].append(new_package)
             process_note(new_package)
-            if new_package.status in self.statuses:
-                self.statuses[new_package.status].append(new_package)
-            else:
-                self.statuses[new_package.status] = [new_package]
+            if new_package.status == "Preassigned":
+                self.preassigned[new_package] = None
             self.packages.append(new_package)
-            self.pkg_id_table[p_id] = new_package
         return
 
-    # Filters main package list into individual tables to track statuses.
+    # Filters main package list into individual tables to track statuses; each step
+    # reads only the packages currently in its status from the store's status buckets.
     # O(N*M)
     def process_package_states(self, trucks, start_time):
-        delayed_lst = self.statuses["Delayed"]
-        if len(delayed_lst) > 0:
-            self.identify_delayed(delayed_lst)
-        assigned_lst = self.statuses["Preassigned"]
-        if len(assigned_lst) > 0:
-            self.identify_assignments(trucks, assigned_lst, start_time)
-        bundle_lst = self.statuses["Bundling"]
-        if len(bundle_lst) > 0:
-            self.identify_bundles(bundle_lst)
-        correction_lst = self.statuses["Correction needed"]
-        if len(correction_lst) > 0:
-            self.identify_corrections(correction_lst)
+        store = self.store
+        if store.status_count("Delayed") > 0:
+            self.identify_delayed(store.with_status("Delayed"))
+        if store.status_count("Preassigned") > 0:
+            self.identify_assignments(trucks, store.with_status("Preassigned"), start_time)
+        if store.status_count("Bundling") > 0:
+            self.identify_bundles(store.with_status("Bundling"))
+        if store.status_count("Correction needed") > 0:
+            self.identify_corrections(store.with_status("Correction needed"))
         return
 
     # Loads late packages to late arrivals and status tables.
@@ -82,10 +82,13 @@ class Hub:
             address = pkg.address
             truck_assignment = int(pkg.note.split("Can only be on truck ")[1])
             assigned_deliveries[address] = truck_assignment
-            logging.debug('Package pre-assigned: packageID={}, truckID={}'.format(pkg.id, truck_assignment))
-        hub_vertex = self.city_graph.get_vertex('HUB')
+            logging.debug('Package pre-assigned: packageID=%s, truckID=%s', pkg.id, truck_assignment)
+        hub_vertex = self.depot
         for address in assigned_deliveries:
             truck_id = assigned_deliveries[address]
+            if not 0 < truck_id <= len(trucks):
+                raise ValueError('Package restricted to missing truck: truckID=%s, truck_count=%s'
+                                 % (truck_id, len(trucks)))
             truck = trucks[truck_id - 1]
             self.load_delivery(truck, address)
             truck.schedule_deliveries(self.city_graph, hub_vertex, hub_vertex, start_time)
@@ -105,10 +108,15 @@ class Hub:
                 new_list.append(other_pkg)
             self.bundles[pkg] = new_list
         prev_pkg = comparison_lst[0]
-        logging.debug('Loaded bundles: {}'.format(self.bundles))
+        # Bundles keep changing below, so they are logged as strings taken now; the log may
+        # be written later by a background thread (see log_setup).
+        log_bundles = logging.root.isEnabledFor(logging.DEBUG)
+        if log_bundles:
+            logging.debug('Loaded bundles: %s', str(self.bundles))
         logging.debug('Comparing bundles...')
         for pkg in comparison_lst:
-            logging.debug('Current bundle: {} (size={})'.format(self.bundles[pkg], len(self.bundles[pkg])))
+            if log_bundles:
+                logging.debug('Current bundle: %s (size=%s)', str(self.bundles[pkg]), len(self.bundles[pkg]))
             if pkg is not prev_pkg:
                 self.compare_bundles(prev_pkg, pkg)
             logging.info('Skipping bundle: no merge candidates')
@@ -124,10 +132,10 @@ class Hub:
                 for some_pkg in self.deliveries[address]:
                     if some_pkg not in self.bundles[bundle]:
                         self.bundles[bundle].append(some_pkg)
-                        logging.info('Appending to bundle: package_id={}, address={}'.format(some_pkg.id,
-                                                                                             address.label))
+                        logging.info('Appending to bundle: package_id=%s, address=%s', some_pkg.id, address.label)
                         update_status(some_pkg, "Bundled")
-        logging.debug('Loaded bundles: {}'.format(self.bundles))
+        if log_bundles:
+            logging.debug('Loaded bundles: %s', str(self.bundles))
         return
 
     # Loads packages with incorrect information to status table
@@ -141,25 +149,25 @@ class Hub:
 
     # Determines next package based on closest distance to a truck's last scheduled location
     # if that truck already has packages, otherwise it selects the package with the earliest deadline.
-    # O(N^2 * M), where N = number of vertices; M = number of packages
+    # O(log N + A), where N = number of packages; A = addresses sharing the earliest deadline
     def determine_package(self, truck):
-        g = self.city_graph
+        stats = profiling.active
+        if stats is not None:
+            start = time.perf_counter()
         if truck.package_count == 0:
-            self.packages.sort(key=lambda pkg: pkg.deadline, reverse=True)
-            next_package = self.packages.pop()
+            next_package = self.packages.pop_earliest()
         else:
-            self.packages.sort(key=lambda pkg: (pkg.deadline, shortest_distance(g,
-                                                                                truck.last_location(),
-                                                                                pkg.address)),
-                               reverse=True)
-            next_package = self.packages.pop()
+            next_package = self.packages.pop_nearest(self.city_graph, truck.last_location())
+        if stats is not None:
+            stats.count('determine_package')
+            stats.add_time('determine_package', start)
         return next_package
 
     # Schedule the package and any packages with similar address to truck.
     # O(N*M*P), where N < M <= P
     def process_package(self, truck, package):
-        process_log = 'Processing: truck_id={}, package_id={}, package_status={}'
-        logging.debug(process_log.format(truck.id, package.id, package.status))
+        process_log = 'Processing: truck_id=%s, package_id=%s, package_status=%s'
+        logging.debug(process_log, truck.id, package.id, package.status)
         if "Bundled" in package.status:
             for other_pkg in self.bundles:
                 if package in self.bundles[other_pkg]:
@@ -172,11 +180,61 @@ class Hub:
             self.load_delivery(truck, address)
         return
 
+    # Groups the packages waiting at the hub into the loads process_package makes of
+    # them: everything at one address, or a whole bundle with everything at its
+    # addresses; loads sharing an address are merged. Returns one tuple per load:
+    # (packages to pass to process_package, vertex of the first, package count,
+    # earliest deadline), in the order the pool holds them.
+    # O(N + B), where N = packages at the hub; B = packages in bundles
+    def ready_loads(self):
+        bundle_of = {}
+        for key, members in self.bundles.items():
+            bundle_of.setdefault(key, key)
+            for member in members:
+                bundle_of.setdefault(member, key)
+        parent = {}
+
+        # O(a(A)) amortized, where A = number of addresses
+        def find(address):
+            while parent[address] is not address:
+                parent[address] = parent[parent[address]]
+                address = parent[address]
+            return address
+
+        pending = list(self.packages)
+        for pkg in pending:
+            addresses = [pkg.address]
+            if pkg in bundle_of and ("Bundled" in pkg.status or "Bundling" in pkg.status):
+                key = bundle_of[pkg]
+                addresses += [key.address] + [member.address for member in self.bundles[key]]
+            for address in addresses:
+                parent.setdefault(address, address)
+            root = find(addresses[0])
+            for address in addresses[1:]:
+                other = find(address)
+                if other is not root:
+                    parent[other] = root
+        loads = {}  # root address: [packages to process, addresses]
+        for pkg in pending:
+            root = find(pkg.address)
+            if root not in loads:
+                loads[root] = [[], set()]
+            loads[root][0].append(pkg)
+        for address in parent:
+            loads[find(address)][1].add(address)
+        ready = []
+        for packages, addresses in loads.values():
+            loaded = [other for address in addresses for other in self.deliveries.get(address, ())
+                      if other.status != "Delivered" and other.status != "On truck"]
+            deadline = min(other.deadline for other in loaded + packages)
+            ready.append((packages, packages[0].address, len(set(loaded + packages)), deadline))
+        return ready
+
     # Combines dictionary list values if intersection exists.
     # O(N)
     def compare_bundles(self, pkg_a, pkg_b):
         if common_bundle(self.bundles[pkg_a], self.bundles[pkg_b]):
-            logging.info('Merging bundles: pkg_a_ID={}, pkg_b_ID={}'.format(pkg_a.id, pkg_b.id))
+            logging.info('Merging bundles: pkg_a_ID=%s, pkg_b_ID=%s', pkg_a.id, pkg_b.id)
             pkg_lst = self.bundles.pop(pkg_b)
             self.bundles[pkg_a].append(pkg_b)
             for pkg in pkg_lst:
@@ -219,8 +277,8 @@ class Hub:
     # whether they share a common address, or have bundling requirements.
     # O(1)
     def total_pkg_count(self, pkg):
-        total_count_log = 'Counting: package_id={}, address={}'
-        logging.debug(total_count_log.format(pkg.id, pkg.address.label))
+        total_count_log = 'Counting: package_id=%s, address=%s'
+        logging.debug(total_count_log, pkg.id, pkg.address.label)
         bundle_size = 0
         address = pkg.address
         if len(self.bundles) > 0:
@@ -237,16 +295,16 @@ class Hub:
             self.packages.remove(package)
         update_status(package, "On truck")
         truck.add_package(package)
-        logging.info('Package loaded: packageID={}, truckID={} [package_count={}]'.format(package.id,
-                                                                                          truck.id,
-                                                                                          truck.package_count))
-        logging.debug('{}'.format(package))
+        load_log = 'Package loaded: packageID=%s, truckID=%s [package_count=%s]'
+        logging.info(load_log, package.id, truck.id, truck.package_count)
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(str(package))
         return
 
     # Loads a truck with all packages associated with a single delivery address
     # O(N)
     def load_delivery(self, truck, address):
-        logging.info('Loading delivery: truckID={}, address={}'.format(truck.id, address.label))
+        logging.info('Loading delivery: truckID=%s, address=%s', truck.id, address.label)
         if address in self.deliveries:
             packages = self.deliveries[address]
             for package in packages:
@@ -254,19 +312,19 @@ class Hub:
                     if package.status != "On truck":
                         self.load_package(truck, package)
         else:
-            logging.error('Delivery load failed: truckID={}, address={}'.format(truck.id, address.label))
+            logging.error('Delivery load failed: truckID=%s, address=%s', truck.id, address.label)
         return
 
     # Loads a truck with all packages with particular bundling requirements.
     # O(N*M)
     def load_bundle(self, truck, package):
-        logging.info('Loading bundle: truckID={}, bundle_key={} (packageID)'.format(truck.id, package.id))
+        logging.info('Loading bundle: truckID=%s, bundle_key=%s (packageID)', truck.id, package.id)
         packages = self.bundles[package]
         packages.append(package)
         addresses = []
         for pkg in packages:
             self.bundles[pkg] = packages
-            logging.info('Un-bundling: packageID={}, address={}, status={}'.format(pkg.id, pkg.address, pkg.status))
+            logging.info('Un-bundling: packageID=%s, address=%s, status=%s', pkg.id, pkg.address, pkg.status)
             if pkg.address not in addresses:
                 addresses.append(pkg.address)
         for address in addresses:
@@ -275,15 +333,15 @@ class Hub:
 
     # Updates package objects determined to be delayed arrivals and appends them
     # to list of packages for trucks to pull from.
-    # O(N)
+    # O(D), where D = number of delayed packages
     def receive_packages(self, arrival_time):
         logging.info('Receiving additional packages...')
-        delayed_lst = self.statuses["Delayed"]
+        delayed_lst = self.store.with_status("Delayed")
         received_lst = []
         for package in delayed_lst:
             received_lst.append(package)
             address = package.address
-            logging.debug('packageID={}, address={}'.format(package.id, address.label))
+            logging.debug('packageID=%s, address=%s', package.id, address.label)
             if address in self.deliveries:
                 if package not in self.deliveries[address]:
                     logging.debug('Appending to existing delivery...')
@@ -299,10 +357,13 @@ class Hub:
             update_status(package, "At hub")
         return
 
-    # Corrects package at specified time; doesn't update if package already delivered or on truck
+    # Corrects package at specified time; doesn't update if package already delivered or on truck.
+    # Does nothing at a hub that does not hold the package.
     # O(1)
     def correct_package(self):
         logging.info('Correcting packages...')
+        if 9 not in self.pkg_id_table:
+            return
         pkg = self.pkg_id_table[9]
         address = '410 S State St'
         address = self.city_graph.get_vertex(address)
@@ -314,7 +375,7 @@ class Hub:
             self.deliveries[address].append(pkg)
         else:
             self.deliveries[address] = [pkg]
-        logging.info('Correction made: package_id={}, address={}'.format(pkg.id, pkg.address))
+        logging.info('Correction made: package_id=%s, address=%s', pkg.id, pkg.address)
         self.packages.append(pkg)
         return
 
@@ -337,11 +398,13 @@ def process_note(pkg):
     return
 
 
-# Relocates package from one state in a table to another.
+# Relocates package from one state in a table to another; raises ValueError for a
+# status outside package.STATUS_NAMES.
 # O(1)
 def update_status(pkg, new_status):
-    status_log = 'Updating package status: package_id={}, old_status={}, new_status={}'
-    logging.info(status_log.format(pkg.id, pkg.status, new_status))
+    status_code(new_status)
+    status_log = 'Updating package status: package_id=%s, old_status=%s, new_status=%s'
+    logging.info(status_log, pkg.id, pkg.status, new_status)
     pkg.status = new_status
     return
 
@@ -360,8 +423,9 @@ def to_sec(time_str):
     return hour * 3600 + minute * 60
 
 
-# Returns list of trucks currently located at Hub.
+# Returns list of trucks currently located at Hub (the 'HUB' address unless another depot is given).
 # O(N), where N = truck count
-def available_trucks(graph, truck_lst):
-    hub_vertex = graph.get_vertex('HUB')
+def available_trucks(graph, truck_lst, hub_vertex=None):
+    if hub_vertex is None:
+        hub_vertex = graph.get_vertex('HUB')
     return list(filter(lambda truck: truck.location is hub_vertex, truck_lst))
@@ -1,28 +1,116 @@
 # Michael Craig, 000955248
 
 
+# The fixed set of package statuses; a status is stored in a package store's status
+# column as its position in this tuple.
+STATUS_NAMES = ('', 'At hub', 'Preassigned', 'Bundling', 'Bundled', 'Delayed', 'Correction needed', 'On truck',
+                'Delivered')
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+
+# Returns code for a status name; raises ValueError for a name not in STATUS_NAMES.
+# O(1)
+def status_code(name):
+    if name not in STATUS_CODES:
+        raise ValueError('Unknown package status: %s' % name)
+    return STATUS_CODES[name]
+
+
 # Package object for housing package information.
+# A package is a view onto one row of a PackageStore; its fields live in the store's
+# columns. Status changes go through the store, which files the row under its new status.
 class Package:
-    def __init__(self, p_id, address, deadline, city, state, p_zip, weight, note):
-        self.id = p_id
-        self.address = address
-        self.deadline = deadline
-        self.city = city
-        self.state = state
-        self.zip = p_zip
-        self.weight = weight
-        self.note = note
-        self.status = ""
-        self.arrival_time = 86399
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    # O(1)
+    @property
+    def id(self):
+        return self.store.ids[self.row]
+
+    # O(1)
+    @property
+    def address(self):
+        return self.store.graph.vertices[self.store.address_indexes[self.row]]
+
+    # O(1)
+    @address.setter
+    def address(self, new_address):
+        self.store.address_indexes[self.row] = self.store.graph.vertex_index[new_address]
+
+    # O(1)
+    @property
+    def deadline(self):
+        return self.store.deadlines[self.row]
+
+    # O(1)
+    @property
+    def arrival_time(self):
+        return self.store.arrival_times[self.row]
+
+    # O(1)
+    @arrival_time.setter
+    def arrival_time(self, new_time):
+        self.store.arrival_times[self.row] = new_time
+
+    # O(1)
+    @property
+    def status(self):
+        return STATUS_NAMES[self.store.statuses[self.row]]
+
+    # O(1)
+    @status.setter
+    def status(self, new_status):
+        self.store.set_status(self.row, new_status)
+
+    # O(1)
+    @property
+    def city(self):
+        return self.store.cities[self.row]
+
+    # O(1)
+    @property
+    def state(self):
+        return self.store.states[self.row]
+
+    # O(1)
+    @property
+    def zip(self):
+        return self.store.zips[self.row]
+
+    # O(1)
+    @zip.setter
+    def zip(self, new_zip):
+        self.store.zips[self.row] = new_zip
+
+    # O(1)
+    @property
+    def weight(self):
+        return self.store.weights[self.row]
+
+    # O(1)
+    @property
+    def note(self):
+        return self.store.notes[self.row]
 
     # String override for memory location.
     def __str__(self):
-        row_format = '|\t{:<3}\t|\t{:<70}\t|\t{:<6}\t|\t{:<8}\t|\t{:<9} [{:<5}]\t|\n'
-        address = "{}, {} {}".format(self.address.label, self.city, str(self.zip))
-        arrival = clock_time(self.arrival_time)
-        late_check = str(self.arrival_time <= self.deadline)
-        row_format = row_format.format(str(self.id), address, self.weight, self.status, arrival, late_check)
-        return str(row_format)
+        return package_row(self.id, self.address.label, self.city, self.zip, self.weight, self.status,
+                           self.arrival_time, self.deadline)
+
+
+# Formats package details as one row of a truck's package list.
+# O(1)
+def package_row(p_id, address_label, city, p_zip, weight, status, arrival_time, deadline):
+    row_format = '|\t{:<3}\t|\t{:<70}\t|\t{:<6}\t|\t{:<8}\t|\t{:<9} [{:<5}]\t|\n'
+    address = "{}, {} {}".format(address_label, city, str(p_zip))
+    arrival = clock_time(arrival_time)
+    late_check = str(arrival_time <= deadline)
+    row_format = row_format.format(str(p_id), address, weight, status, arrival, late_check)
+    return str(row_format)
 
 
 # Converts seconds count to HH:MM format
@@ -0,0 +1,88 @@
+# Michael Craig, 000955248
+from app import profiling
+import heapq
+
+
+# Pending packages at the hub, indexed by deadline and then by delivery address.
+# Deadlines are kept in a min-heap so the earliest bucket is found without scanning,
+# and each bucket groups its packages by address so a nearest-address query only
+# looks at one distance row entry per address. Supports the list operations the
+# simulation relies on (append, remove, in, len, iteration).
+class PackagePool:
+    def __init__(self):
+        self.buckets = {}  # deadline: {address: [packages]}
+        self.deadlines = []  # min-heap of deadlines; may hold stale entries
+        self.keys = {}  # package: (deadline, address) used when it was added
+
+    # Adds package to the bucket for its deadline and address.
+    # O(log N), where N = number of distinct deadlines
+    def append(self, pkg):
+        if pkg in self.keys:
+            return
+        deadline = pkg.deadline
+        address = pkg.address
+        if deadline not in self.buckets:
+            self.buckets[deadline] = {}
+            heapq.heappush(self.deadlines, deadline)
+        bucket = self.buckets[deadline]
+        if address not in bucket:
+            bucket[address] = []
+        bucket[address].append(pkg)
+        self.keys[pkg] = (deadline, address)
+        return
+
+    # Removes package from its bucket; empty address groups and buckets are dropped.
+    # O(P), where P = packages sharing the package's deadline and address
+    def remove(self, pkg):
+        deadline, address = self.keys.pop(pkg)
+        bucket = self.buckets[deadline]
+        bucket[address].remove(pkg)
+        if not bucket[address]:
+            del bucket[address]
+            if not bucket:
+                del self.buckets[deadline]
+        return
+
+    # Returns earliest deadline among pending packages, discarding stale heap entries.
+    # O(log N) amortized
+    def earliest_deadline(self):
+        while self.deadlines and self.deadlines[0] not in self.buckets:
+            heapq.heappop(self.deadlines)
+        if not self.deadlines:
+            raise ValueError('No packages pending')
+        return self.deadlines[0]
+
+    # Removes and returns the most recently added package with the earliest deadline.
+    # O(log N)
+    def pop_earliest(self):
+        bucket = self.buckets[self.earliest_deadline()]
+        address = next(reversed(bucket))
+        pkg = bucket[address][-1]
+        self.remove(pkg)
+        return pkg
+
+    # Removes and returns a package with the earliest deadline whose address is closest
+    # to a vertex; equal distances favour the most recently added address.
+    # O(log N + A), where A = addresses sharing the earliest deadline
+    def pop_nearest(self, graph, vertex):
+        bucket = self.buckets[self.earliest_deadline()]
+        distances = graph.shortest_paths_from(vertex)[0]
+        if profiling.active is not None:
+            profiling.active.count('determine_package.candidates', len(bucket))
+        address = min(reversed(bucket), key=lambda address_vertex: distances[graph.vertex_index[address_vertex]])
+        pkg = bucket[address][-1]
+        self.remove(pkg)
+        return pkg
+
+    # O(1)
+    def __contains__(self, pkg):
+        return pkg in self.keys
+
+    # O(1)
+    def __len__(self):
+        return len(self.keys)
+
+    # Iterates pending packages in the order they were added.
+    # O(N)
+    def __iter__(self):
+        return iter(list(self.keys))
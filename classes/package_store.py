@@ -0,0 +1,111 @@
+# Michael Craig, 000955248
+from .package import Package, STATUS_NAMES, status_code
+from array import array
+
+
+# Column store for a hub's packages: one typed array per numeric field (id, address
+# index into the city graph, deadline, arrival time, status code) and one list per
+# text field, with row r of every column describing the same package. Package objects
+# handed to the rest of the simulation are __slots__ views onto a row, created once per
+# package so they can still be compared and used as keys. Bulk queries run over whole
+# columns at once instead of visiting package objects.
+# Rows are also filed by status code in the order they entered their status, and moved
+# between these buckets as statuses change, so counting or listing the packages in a
+# status never scans the status column. These buckets are the hub's only status index.
+class PackageStore:
+    def __init__(self, graph):
+        self.graph = graph
+        self.ids = array('q')
+        self.address_indexes = array('l')
+        self.deadlines = array('l')
+        self.arrival_times = array('d')
+        self.statuses = array('b')
+        self.status_rows = {}  # status code: {row: None}, in order of entering the status
+        self.cities = []
+        self.states = []
+        self.zips = []
+        self.weights = []
+        self.notes = []
+        self.views = []
+
+    # Appends a package row; returns its view.
+    # O(1) amortized
+    def add(self, p_id, address, deadline, city, state, p_zip, weight, note):
+        row = len(self.ids)
+        self.ids.append(p_id)
+        self.address_indexes.append(self.graph.vertex_index[address])
+        self.deadlines.append(deadline)
+        self.arrival_times.append(86399)
+        self.statuses.append(status_code(''))
+        self.status_rows.setdefault(status_code(''), {})[row] = None
+        self.cities.append(city)
+        self.states.append(state)
+        self.zips.append(p_zip)
+        self.weights.append(weight)
+        self.notes.append(note)
+        view = Package(self, row)
+        self.views.append(view)
+        return view
+
+    # Sets status of a row, moving it to the bucket of its new status; setting the
+    # status a row already has leaves it where it is.
+    # O(1)
+    def set_status(self, row, new_status):
+        old_code = self.statuses[row]
+        new_code = status_code(new_status)
+        if new_code != old_code:
+            del self.status_rows[old_code][row]
+            self.status_rows.setdefault(new_code, {})[row] = None
+            self.statuses[row] = new_code
+        return
+
+    # Returns views of the rows in a status, in the order they entered it.
+    # O(M), where M = number of rows in the status
+    def with_status(self, status):
+        rows = self.status_rows.get(status_code(status), ())
+        return [self.views[row] for row in rows]
+
+    # Counts rows in a status.
+    # O(1)
+    def status_count(self, status):
+        return len(self.status_rows.get(status_code(status), ()))
+
+    # Sets status of the leading rows whose arrival time is at or before sec_count to
+    # Delivered, reading the arrival and status columns directly; rows must be in ascending
+    # arrival order, as a truck's load is. Returns the number of rows delivered.
+    # O(D), where D = number of rows delivered
+    def mark_delivered(self, sec_count, rows):
+        arrival_times = self.arrival_times
+        statuses = self.statuses
+        status_rows = self.status_rows
+        delivered_code = status_code('Delivered')
+        delivered_rows = status_rows.setdefault(delivered_code, {})
+        count = 0
+        for row in rows:
+            if arrival_times[row] > sec_count:
+                break
+            old_code = statuses[row]
+            if old_code != delivered_code:
+                del status_rows[old_code][row]
+                delivered_rows[row] = None
+                statuses[row] = delivered_code
+            count += 1
+        return count
+
+    # Counts delivered packages that arrived after their deadline, reading only the
+    # arrival and deadline columns of the delivered rows.
+    # O(D), where D = number of delivered rows
+    def late_count(self):
+        arrival_times = self.arrival_times
+        deadlines = self.deadlines
+        return sum(1 for row in self.status_rows.get(status_code('Delivered'), ())
+                   if arrival_times[row] > deadlines[row])
+
+    # Counts packages per status name.
+    # O(S), where S = number of statuses
+    def status_counts(self):
+        return {STATUS_NAMES[code]: len(rows) for code, rows in self.status_rows.items() if rows}
+
+    # O(1)
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,36 @@
+# Michael Craig, 000955248
+from app.classes.event_queue import EventQueue, PACKAGE_RECEIPT, CORRECTION, ARRIVAL, TRUCK_RETURN, DISPATCH
+import random
+
+
+def drain(events):
+    popped = []
+    while len(events) > 0:
+        popped.append(events.pop())
+    return popped
+
+
+def test_orders_by_time_then_type():
+    events = EventQueue()
+    events.push(36000, DISPATCH)
+    events.push(32700, ARRIVAL, 'truck 1')
+    events.push(32700, PACKAGE_RECEIPT)
+    events.push(32700, TRUCK_RETURN)
+    events.push(37200, CORRECTION)
+    assert events.next_time() == 32700
+    assert drain(events) == [(32700, PACKAGE_RECEIPT, None), (32700, ARRIVAL, 'truck 1'),
+                             (32700, TRUCK_RETURN, None), (36000, DISPATCH, None), (37200, CORRECTION, None)]
+
+
+# Events sharing time and type come out in the order they were pushed, whatever the
+# payloads are, so a run is repeatable.
+def test_ties_keep_insertion_order():
+    rng = random.Random(1)
+    events = EventQueue()
+    pushed = []
+    for payload in range(200):
+        event = (rng.choice((28800, 32700)), rng.choice((ARRIVAL, DISPATCH)), {'payload': payload})
+        events.push(*event)
+        pushed.append(event)
+    popped = drain(events)
+    assert popped == sorted(pushed, key=lambda event: (event[0], event[1], event[2]['payload']))
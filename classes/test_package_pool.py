@@ -0,0 +1,64 @@
+# Michael Craig, 000955248
+from app.classes.city import Address, City
+from app.classes.package_pool import PackagePool
+import pytest
+
+
+class Parcel:
+    def __init__(self, deadline, address):
+        self.deadline = deadline
+        self.address = address
+
+
+# Line graph HUB - NEAR - FAR, one mile per road.
+@pytest.fixture
+def city():
+    graph = City()
+    hub, near, far = Address('HUB'), Address('NEAR'), Address('FAR')
+    for vertex in (hub, near, far):
+        graph.add_address(vertex)
+    graph.add_route(hub, near)
+    graph.add_route(near, far)
+    return graph
+
+
+def test_buckets_by_deadline_and_address(city):
+    _, near, far = city.vertices
+    pool = PackagePool()
+    parcels = [Parcel(36000, near), Parcel(36000, near), Parcel(86399, far), Parcel(36000, far)]
+    for parcel in parcels:
+        pool.append(parcel)
+    pool.append(parcels[0])
+    assert len(pool) == 4
+    assert list(pool) == parcels
+    assert pool.buckets[36000] == {near: parcels[:2], far: [parcels[3]]}
+    pool.remove(parcels[3])
+    assert far not in pool.buckets[36000]
+    assert parcels[3] not in pool
+
+
+def test_earliest_deadline_skips_emptied_buckets():
+    pool = PackagePool()
+    early, late = Parcel(30000, 'a'), Parcel(40000, 'b')
+    pool.append(late)
+    pool.append(early)
+    assert pool.earliest_deadline() == 30000
+    pool.remove(early)
+    assert 30000 not in pool.buckets
+    assert pool.earliest_deadline() == 40000
+    assert pool.pop_earliest() is late
+    with pytest.raises(ValueError):
+        pool.earliest_deadline()
+
+
+# The earliest deadline wins over distance; within it the nearest address is taken.
+def test_pop_nearest(city):
+    hub, near, far = city.vertices
+    pool = PackagePool()
+    first_far, first_near, later_near = Parcel(36000, far), Parcel(36000, near), Parcel(86399, near)
+    for parcel in (later_near, first_far, first_near):
+        pool.append(parcel)
+    assert pool.pop_nearest(city, hub) is first_near
+    assert pool.pop_nearest(city, hub) is first_far
+    assert pool.pop_nearest(city, far) is later_near
+    assert len(pool) == 0
@@ -0,0 +1,31 @@
+# Michael Craig, 000955248
+from app.classes.package_store import PackageStore
+
+
+def stocked_store(line_city, arrivals, deadline=86399):
+    graph, at = line_city
+    store = PackageStore(graph)
+    for p_id, arrival in enumerate(arrivals, 1):
+        package = store.add(p_id, at['E1'], deadline, 'City', 'UT', '84000', '1', '')
+        package.status = 'On truck'
+        package.arrival_time = arrival
+    return store
+
+
+# Only the leading rows due by the given time are delivered, and a row already delivered
+# is counted without being filed again.
+def test_mark_delivered_takes_due_prefix(line_city):
+    store = stocked_store(line_city, [29000, 29000, 29500, 86399])
+    assert store.mark_delivered(28999, [0, 1, 2, 3]) == 0
+    assert store.mark_delivered(29000, [0, 1, 2, 3]) == 2
+    assert store.status_counts() == {'On truck': 2, 'Delivered': 2}
+    assert store.mark_delivered(29500, [1, 2, 3]) == 2
+    assert [package.id for package in store.with_status('Delivered')] == [1, 2, 3]
+    assert store.with_status('On truck')[0].arrival_time == 86399
+
+
+def test_late_count_reads_delivered_rows(line_city):
+    store = stocked_store(line_city, [29000, 31000, 32000], deadline=30000)
+    assert store.late_count() == 0
+    store.mark_delivered(31000, [0, 1, 2])
+    assert store.late_count() == 1
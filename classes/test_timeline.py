@@ -0,0 +1,51 @@
+# Michael Craig, 000955248
+from app.classes.timeline import append_state, state_at
+from app.main import build_timeline, status_snapshots
+import pytest
+
+
+def test_append_state_skips_repeats():
+    times, states = [], []
+    append_state(times, states, 100, 'a')
+    append_state(times, states, 200, 'a')
+    append_state(times, states, 300, 'b')
+    assert times == [100, 300]
+    assert states == ['a', 'b']
+
+
+# A state recorded again at the same time replaces the earlier one, and is dropped
+# altogether when that brings back the state before it.
+def test_append_state_same_time_replaces():
+    times, states = [], []
+    append_state(times, states, 100, 'a')
+    append_state(times, states, 200, 'b')
+    append_state(times, states, 200, 'c')
+    assert (times, states) == ([100, 200], ['a', 'c'])
+    append_state(times, states, 200, 'a')
+    assert (times, states) == ([100], ['a'])
+
+
+def test_state_at_bisects():
+    times, states = [100, 200, 300], ['a', 'b', 'c']
+    assert state_at(times, states, 0) == 'a'
+    assert state_at(times, states, 100) == 'a'
+    assert state_at(times, states, 199) == 'a'
+    assert state_at(times, states, 200) == 'b'
+    assert state_at(times, states, 86399) == 'c'
+
+
+# Every package looked up in the recorded timeline must match a forward simulation
+# stopped at the same time.
+def test_timeline_matches_snapshots(sample_day):
+    packages, graph = sample_day
+    timeline = build_timeline(packages, graph)
+    query_times = list(range(8 * 3600, 14 * 3600, 900))
+    for snapshot in status_snapshots(packages, graph, query_times):
+        for p_id, (status, arrival_time, _) in snapshot['packages'].items():
+            assert timeline.package_at(p_id, snapshot['time'])[:2] == (status, arrival_time)
+
+
+def test_status_snapshots_need_ascending_times(sample_day):
+    packages, graph = sample_day
+    with pytest.raises(ValueError):
+        list(status_snapshots(packages, graph, [36000, 32400]))
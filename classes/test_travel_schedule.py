@@ -0,0 +1,49 @@
+# Michael Craig, 000955248
+from app.classes.city import Address
+from app.classes.travel_schedule import TravelSchedule
+import pytest
+
+
+# Schedule leaving A at 1000 for B (2 miles, 1400), C (0 miles, 1400) and D (3 miles, 2000).
+@pytest.fixture
+def schedule():
+    vertices = [Address(label) for label in 'ABCD']
+    itinerary = TravelSchedule(vertices[0])
+    itinerary.schedule_start(1000)
+    for vertex, leg, arrival in zip(vertices[1:], (2, 0, 3), (1400, 1400, 2000)):
+        vertex.arrival_time = arrival
+        itinerary.schedule_location(vertex, leg)
+    return itinerary
+
+
+def label_at(itinerary, sec_count):
+    return itinerary.position_at(sec_count)[0].label
+
+
+def test_position_at(schedule):
+    assert label_at(schedule, 0) == 'A'
+    assert schedule.position_at(1399) == (schedule.vertices[0], 0)
+    assert label_at(schedule, 1400) == 'C'
+    assert schedule.position_at(1400)[1] == 2
+    assert schedule.position_at(5000)[1] == 5
+    assert schedule.end_time == 2000
+
+
+def test_next_stop_after(schedule):
+    assert schedule.next_stop_after(1000)[0].label == 'B'
+    assert schedule.next_stop_after(1400) == (schedule.vertices[3], 2000)
+    assert schedule.next_stop_after(2000) is None
+
+
+def test_remaining_distance(schedule):
+    assert schedule.remaining_distance(1000) == 5
+    assert schedule.remaining_distance(1200) == 4
+    assert schedule.remaining_distance(1700) == 1.5
+    assert schedule.remaining_distance(2500) == 0
+
+
+def test_stops_between(schedule):
+    assert list(schedule.stops_between(0, 1400)) == []
+    assert list(schedule.stops_between(1000, 1401)) == [1, 2]
+    assert list(schedule.stops_between(1400, 2001)) == [1, 2, 3]
+    assert list(schedule.stops_between(1500, 2000)) == []
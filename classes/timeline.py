@@ -0,0 +1,103 @@
+# Michael Craig, 000955248
+from .package import package_row
+from .truck import truck_report
+from bisect import bisect_right
+
+
+# Record of a simulated day: every change to a package's status, scheduled arrival or
+# address, and every change to a truck's position or tour, each stamped with the
+# simulation time it happened. A status query for any time of day is then a bisect
+# into these histories instead of a replay of the day.
+class Timeline:
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.package_info = {}  # package id: (city, weight, deadline)
+        self.package_times = {}  # package id: [times]
+        self.package_states = {}  # package id: [(status, arrival_time, address label, zip)]
+        self.truck_ids = []
+        self.truck_times = {}  # truck id: [times]
+        self.truck_states = {}  # truck id: [(location label, package count, start, end, odometer, package ids)]
+
+    # Appends states that differ from the last recorded ones; a state recorded again at
+    # the same time replaces the earlier one.
+    # O(N + T*P), where N = number of packages; T = number of trucks; P = packages per truck
+    def record(self, sim_time, packages, trucks):
+        for pkg in packages:
+            if pkg.id not in self.package_info:
+                self.package_info[pkg.id] = (pkg.city, pkg.weight, pkg.deadline)
+                self.package_times[pkg.id] = []
+                self.package_states[pkg.id] = []
+            state = (pkg.status, pkg.arrival_time, pkg.address.label, pkg.zip)
+            append_state(self.package_times[pkg.id], self.package_states[pkg.id], sim_time, state)
+        for truck in trucks:
+            if truck.id not in self.truck_states:
+                self.truck_ids.append(truck.id)
+                self.truck_times[truck.id] = []
+                self.truck_states[truck.id] = []
+            package_ids = tuple(pkg.id for pkg in truck.delivered + truck.packages)
+            state = (truck.location.label, truck.package_count, truck.start_time(), truck.end_time(),
+                     truck.trip_odometer, package_ids)
+            append_state(self.truck_times[truck.id], self.truck_states[truck.id], sim_time, state)
+        return
+
+    # Returns package state at a time of day: (status, arrival_time, address label, zip).
+    # O(log C), where C = number of changes recorded for the package
+    def package_at(self, p_id, sec_count):
+        return state_at(self.package_times[p_id], self.package_states[p_id], sec_count)
+
+    # Returns truck state at a time of day:
+    # (location label, package count, start, end, odometer, package ids).
+    # O(log C), where C = number of changes recorded for the truck
+    def truck_at(self, t_id, sec_count):
+        return state_at(self.truck_times[t_id], self.truck_states[t_id], sec_count)
+
+    # Mileage estimate used by the status report: time from start of day to the end of
+    # each truck's current tour, at truck speed.
+    # O(T log C)
+    def total_mileage(self, sec_count):
+        active_time = 0
+        for t_id in self.truck_ids:
+            active_time += self.truck_at(t_id, sec_count)[3] - self.start_time
+        return active_time * .005  # miles per second
+
+    # Renders each truck and its packages as they stood at a time of day, in the
+    # same layout as printing the trucks at the end of a simulation.
+    # O(T * P log C)
+    def report(self, sec_count):
+        data = ''
+        for t_id in self.truck_ids:
+            location, package_count, start, end, odometer, package_ids = self.truck_at(t_id, sec_count)
+            rows = []
+            for p_id in package_ids:
+                status, arrival_time, address, p_zip = self.package_at(p_id, sec_count)
+                city, weight, deadline = self.package_info[p_id]
+                rows.append((arrival_time, package_row(p_id, address, city, p_zip, weight, status,
+                                                       arrival_time, deadline)))
+            rows.sort(key=lambda row: row[0])
+            data += truck_report(t_id, location, package_count, start, end, odometer, [row[1] for row in rows])
+            data += '\n'
+        return data
+
+
+# Appends state to a history unless it matches the latest entry.
+# O(1)
+def append_state(times, states, sim_time, state):
+    if states and states[-1] == state:
+        return
+    if times and times[-1] == sim_time:
+        states[-1] = state
+        if len(states) > 1 and states[-2] == state:
+            times.pop()
+            states.pop()
+        return
+    times.append(sim_time)
+    states.append(state)
+    return
+
+
+# Returns latest state recorded at or before a time; the first state for earlier times.
+# O(log C)
+def state_at(times, states, sec_count):
+    position = bisect_right(times, sec_count) - 1
+    return states[max(position, 0)]
+
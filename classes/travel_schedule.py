@@ -1,43 +1,85 @@
 # Michael Craig, 000955248
+from array import array
+from bisect import bisect_left, bisect_right
 
 
 # Tracks start and end times of trucks leaving hub, along with keeping record
 # of partial distance and each location.
+# Stops are kept in visiting order in three parallel arrays: cumulative distance,
+# arrival time and vertex. Both numeric arrays never decrease, so where a truck is at
+# any time of day is a binary search. Index 0 is the starting location, reached at
+# distance 0 when the schedule starts; stops sharing a distance (zero-length legs)
+# are all kept.
 class TravelSchedule:
     def __init__(self, start_vertex):
         self.start_time = 0
         self.end_time = 0
         self.total_distance = 0
-        self.locations = {0: start_vertex}  # distance: vertex
+        self.distances = [0]  # cumulative distance at each stop
+        self.arrival_times = array('d', [0])  # arrival time at each stop
+        self.vertices = [start_vertex]  # vertex of each stop
         self.starting_location = start_vertex
         self.last_location = start_vertex
         self.next_location = start_vertex
 
     # Stores time of arrival to a particular location after a certain amount of distance travelled.
-    # O(1)
-    def schedule_location(self, vertex):
-        current_total = self.total_distance
-        leg_distance = vertex.distance
-        self.total_distance += leg_distance
-        new_total = current_total + leg_distance
-        self.locations[new_total] = vertex
-        self.total_distance = new_total
+    # O(1) amortized
+    def schedule_location(self, vertex, leg_distance):
+        if leg_distance:
+            self.total_distance += leg_distance  # a zero leg leaves the distance as it was
         self.end_time = vertex.arrival_time
+        self.distances.append(self.total_distance)
+        self.arrival_times.append(vertex.arrival_time)
+        self.vertices.append(vertex)
         self.last_location = vertex
         return
 
-    # Appends delivery to end of schedule
-    # O(1)
-    def schedule_delivery(self, delivery, arrival_time):
-        start_time = self.end_time
-        delivery.assign_start(start_time)
-        end_time = arrival_time
-        delivery.assign_end(end_time)
-        return
-
     # Schedules new start time for current itinerary.
     # O(1)
     def schedule_start(self, start_time):
         self.start_time = start_time
         self.end_time = start_time
+        self.arrival_times[0] = start_time
         return
+
+    # Returns index of the last stop reached at a time of day; the starting location
+    # before the schedule starts.
+    # O(log S), where S = number of stops
+    def stop_index_at(self, sec_count):
+        return max(bisect_right(self.arrival_times, sec_count) - 1, 0)
+
+    # Returns (vertex, cumulative distance) of the last stop reached at a time of day.
+    # O(log S)
+    def position_at(self, sec_count):
+        stop = self.stop_index_at(sec_count)
+        return self.vertices[stop], self.distances[stop]
+
+    # Returns (vertex, arrival time) of the first stop reached after a time of day, or
+    # None once the last stop is reached.
+    # O(log S)
+    def next_stop_after(self, sec_count):
+        stop = bisect_right(self.arrival_times, sec_count)
+        if stop == len(self.vertices):
+            return None
+        return self.vertices[stop], self.arrival_times[stop]
+
+    # Returns distance left to travel at a time of day, counting progress along the
+    # current leg in proportion to the time spent on it.
+    # O(log S)
+    def remaining_distance(self, sec_count):
+        stop = self.stop_index_at(sec_count)
+        travelled = self.distances[stop]
+        if stop + 1 < len(self.vertices) and sec_count > self.arrival_times[stop]:
+            leg_time = self.arrival_times[stop + 1] - self.arrival_times[stop]
+            leg_distance = self.distances[stop + 1] - self.distances[stop]
+            if leg_time > 0:
+                travelled += leg_distance * (sec_count - self.arrival_times[stop]) / leg_time
+        return self.total_distance - travelled
+
+    # Returns indexes of stops with arrival times from start_time up to, but not
+    # including, end_time; the starting location is never included.
+    # O(log S)
+    def stops_between(self, start_time, end_time):
+        first = max(bisect_left(self.arrival_times, start_time), 1)
+        last = bisect_left(self.arrival_times, end_time)
+        return range(first, max(last, first))
@@ -2,8 +2,14 @@
 from .travel_schedule import TravelSchedule
 from .package import clock_time
 from .delivery import Delivery
-from app.trip_calc import dsp, shortest_tour, shortest_distance
+from app.trip_calc import shortest_tour, shortest_distance
+from app.tour_opt import optimize_tour
+from app.savings import savings_tour
+from app import profiling
+from array import array
+import heapq
 import logging
+import time
 
 
 logger = logging.getLogger(__name__)
@@ -13,24 +19,31 @@ logging.basicConfig(level=logging.INFO)
 # Separates packages from initial list to reduce size of scheduling parameters
 # from 40 to truck capacity (16) or less.
 class Truck:
-    def __init__(self, t_id, hub_vertex):
+    def __init__(self, t_id, hub_vertex, capacity=16):
         self.id = t_id
         self.SPEED = 18
-        self.total_mileage = 0
+        self.total_mileage = 0  # distance driven on itineraries since replaced
         self.trip_odometer = 0
-        self.capacity = 16
+        self.capacity = capacity
         self.location = hub_vertex
         self.package_count = 0
-        self.packages = []
+        self.packages = []  # in scheduled arrival order once rows is current
+        self.rows = None  # package store row of each package, or None when stale
         self.reserve = []
         self.delivered = []
         self.deliveries = {}
         self.itinerary = TravelSchedule(hub_vertex)
+        self.optimize_tours = False
+        self.planner = 'greedy'  # visit ordering used by schedule_deliveries: 'greedy' or 'savings'
+        self.travel_noise = None  # callable(from_vertex, to_vertex) -> travel time multiplier
+        self.optimizer_iterations = 50
+        self.optimizer_time_limit = None  # seconds; None leaves only the iteration budget, so runs repeat exactly
 
     # Adds single package to truck; includes delivery address if not already in table.
     # O(1)
     def add_package(self, pkg):
         self.packages.append(pkg)
+        self.rows = None
         self.package_count += 1
         address = pkg.address
         if address in self.deliveries:
@@ -43,111 +56,281 @@ class Truck:
     # Determines schedule based on current packages assigned to truck;
     # Does not accumulate mileage, nor does it deliver packages, it just
     # produces a schedule that includes locations to visit and arrival times.
-    # O(N^2 * M^2), where N = number of vertices in graph; M = number of packages on truck (M <= 16)
+    # The visiting order comes from the truck's planner: 'greedy' (greedy_visits) or
+    # 'savings' (savings_visits). The savings planner falls back to greedy: both tours are
+    # planned without touching the truck, and the greedy tour is used instead when it
+    # leaves fewer packages late, or as many and gets back sooner (see plan_rank).
+    # Only the tour used is scheduled, and the planner that made it is logged.
+    # When optimize_tours is set, the order is then refined by local search
+    # and kept only if it is shorter and delays neither the return nor any deadline
+    # package (see optimize_schedule).
+    # O(V + N*S), where V = cost of ordering visits; N = number of vertices in graph;
+    # S = number of stops
     def schedule_deliveries(self, graph, initial_vertex, end_vertex, start_time):
-        new_itinerary = TravelSchedule(initial_vertex)
-        new_itinerary.schedule_start(start_time)  # O(1)
-        self.itinerary = new_itinerary
+        stats = profiling.active
+        if stats is not None:
+            start = time.perf_counter()
+        planner = self.planner
+        if planner == 'savings':
+            visits = self.savings_visits(graph, initial_vertex, start_time)
+        else:
+            visits = self.greedy_visits(graph, initial_vertex)
+        plan = self.plan_visits(graph, initial_vertex, end_vertex, start_time, visits)  # O(N*S)
+        if planner == 'savings':
+            greedy_visits = self.greedy_visits(graph, initial_vertex)
+            greedy_plan = self.plan_visits(graph, initial_vertex, end_vertex, start_time, greedy_visits)  # O(N*S)
+            if plan_rank(greedy_plan) < plan_rank(plan):
+                planner, visits, plan = 'greedy', greedy_visits, greedy_plan
+        self.apply_plan(plan, start_time)
+        if logging.root.isEnabledFor(logging.DEBUG):
+            plan_log = 'Tour planned: truckID=%s, planner=%s [truck planner=%s], distance=%s'
+            logging.debug(plan_log, self.id, planner, self.planner, self.itinerary.total_distance)
+        if self.optimize_tours:
+            self.optimize_schedule(graph, initial_vertex, end_vertex, start_time, visits)
+        if stats is not None:
+            stats.count('schedule_deliveries[truck {}]'.format(self.id))
+            stats.count('schedule_deliveries.planner[{}]'.format(planner))
+            stats.add_time('schedule_deliveries[truck {}]'.format(self.id), start)
+        return
+
+    # Orders truck's packages into visits (address, [packages]) greedily:
+    # packages are bucketed by deadline and then by address; buckets are drained in
+    # deadline order, always visiting the closest remaining address in the bucket,
+    # which is read from the single distance row of the truck's current stop.
+    # O(M*A), where M = number of packages on truck; A = addresses sharing a deadline
+    def greedy_visits(self, graph, initial_vertex):
         cur_vertex = initial_vertex
-        unscheduled = []
-        for package in self.packages:  # O(N)
-            package.arrival_time = 86399
-            unscheduled.append(package)
-        tour = []
-        while unscheduled:  # O(N^2 * M^2)
-            unscheduled.sort(key=lambda pkg: (pkg.deadline, shortest_distance(graph, cur_vertex, pkg.address)),
-                             reverse=True)  # O(N^2 * M)
-            cur_package = unscheduled.pop()
-            next_vertex = cur_package.address
+        deadline_buckets = {}  # deadline: {address: [packages]}
+        for package in self.packages:  # O(M)
+            if package.deadline not in deadline_buckets:
+                deadline_buckets[package.deadline] = {}
+            address_bucket = deadline_buckets[package.deadline]
+            if package.address not in address_bucket:
+                address_bucket[package.address] = []
+            address_bucket[package.address].append(package)
+        deadlines = list(deadline_buckets)
+        heapq.heapify(deadlines)  # O(M)
+        visits = []
+        while deadlines:  # O(M*A)
+            address_bucket = deadline_buckets[heapq.heappop(deadlines)]
+            while address_bucket:
+                distances = graph.shortest_paths_from(cur_vertex)[0]  # O(1)
+                # Equal distances favour the most recently loaded address.
+                next_vertex = min(reversed(address_bucket),
+                                  key=lambda vertex: distances[graph.vertex_index[vertex]])  # O(A)
+                visits.append((next_vertex, address_bucket.pop(next_vertex)))
+                cur_vertex = next_vertex
+        return visits
+
+    # Orders truck's packages into visits (address, [packages]) with the Clarke-Wright
+    # savings tour over its addresses, each due by its packages' earliest deadline.
+    # Addresses are listed in graph order, so ties between savings do not depend on the
+    # order the packages were loaded in.
+    # O(M + A^2), where A = number of addresses on truck
+    def savings_visits(self, graph, initial_vertex, start_time):
+        packages_at = {}
+        for package in self.packages:  # O(M)
+            if package.address not in packages_at:
+                packages_at[package.address] = []
+            packages_at[package.address].append(package)
+        addresses = sorted(packages_at, key=lambda address: graph.vertex_index[address])
+        stops = [(address, len(packages_at[address]), min(package.deadline for package in packages_at[address]))
+                 for address in addresses]
+        order = savings_tour(graph, initial_vertex, stops, start_time, self.SPEED)
+        return [(addresses[stop], packages_at[addresses[stop]]) for stop in order]
+
+    # Builds a new itinerary that visits addresses in the given order and schedules the
+    # truck on it (see plan_visits and apply_plan).
+    # O(N*S), where N = number of vertices in graph; S = number of visits
+    def schedule_visits(self, graph, initial_vertex, end_vertex, start_time, visits):
+        self.apply_plan(self.plan_visits(graph, initial_vertex, end_vertex, start_time, visits), start_time)
+        return
+
+    # Plans an itinerary that visits addresses in the given order, timing every package
+    # at each address; an address already passed through on an earlier leg adds no new leg.
+    # The truck is left as it was: returns the plan (itinerary, {package: arrival time},
+    # {delivery: (start time, end time)}) for apply_plan or for comparing tours.
+    # O(N*S), where N = number of vertices in graph; S = number of visits
+    def plan_visits(self, graph, initial_vertex, end_vertex, start_time, visits):
+        itinerary = TravelSchedule(initial_vertex)
+        itinerary.schedule_start(start_time)  # O(1)
+        arrivals = {}
+        times = {}
+        cur_vertex = initial_vertex
+        tour = set()
+        for next_vertex, packages in visits:
+            cur_delivery = self.deliveries[next_vertex]
             if next_vertex not in tour:
-                dsp(graph, cur_vertex)  # O(N^2)
-                tour_leg = shortest_tour(cur_vertex, next_vertex)  # O(N)
-                tour += tour_leg
-                arrival_time = self.schedule_route(tour_leg)  # O(N)
-                cur_delivery = self.deliveries[next_vertex]
-                self.schedule_delivery(cur_delivery, arrival_time)  # O(1)
-                cur_package.arrival_time = arrival_time
+                tour_leg = shortest_tour(graph, cur_vertex, next_vertex)  # O(N)
+                tour.update(tour_leg)
+                arrival_time = self.schedule_route(graph, itinerary, tour_leg, times)  # O(N)
+                times[cur_delivery] = (itinerary.end_time, arrival_time)
                 cur_vertex = next_vertex
-            else:
-                cur_package.arrival_time = self.deliveries[next_vertex].end_time
-        home_leg = route_to_hub(graph, cur_vertex, end_vertex)  # O(N^2)
-        self.schedule_route(home_leg)  # O(N)
+            end_time = times.get(cur_delivery, (0, cur_delivery.end_time))[1]
+            for package in packages:
+                arrivals[package] = end_time
+        home_leg = route_to_hub(graph, cur_vertex, end_vertex)  # O(N)
+        self.schedule_route(graph, itinerary, home_leg, times)  # O(N)
+        return itinerary, arrivals, times
+
+    # Puts the truck on a planned itinerary (see plan_visits): packages the plan does not
+    # visit are left unscheduled (86399). The distance already driven on the itinerary it
+    # replaces is added to total_mileage.
+    # O(M log M + S), where M = number of packages on truck; S = number of stops
+    def apply_plan(self, plan, start_time):
+        itinerary, arrivals, times = plan
+        self.total_mileage += self.itinerary.position_at(start_time)[1]  # O(log S)
+        self.itinerary = itinerary
+        for package in self.packages:  # O(M)
+            package.arrival_time = arrivals.get(package, 86399)
+        for delivery, (delivery_start, delivery_end) in times.items():  # O(S)
+            delivery.assign_start(delivery_start)
+            delivery.assign_end(delivery_end)
+        self.sort_arrivals()  # O(M log M)
+        return
+
+    # Orders packages by scheduled arrival (ties keep their current order) and records their
+    # package store rows alongside, so the packages due by any time form a prefix of the list.
+    # O(M log M), where M = number of packages on truck
+    def sort_arrivals(self):
+        self.packages.sort(key=lambda package: package.arrival_time)
+        self.rows = array('l', [package.row for package in self.packages])
+        return
+
+    # Takes a package off the truck without delivering it.
+    # O(M)
+    def remove_package(self, package):
+        self.packages.remove(package)
+        self.rows = None
+        self.package_count -= 1
+        return
+
+    # Runs 2-opt/Or-opt local search on the stop order of the current schedule and
+    # reschedules with the result if it shortens the tour without returning later, and
+    # without making any deadline package late (or one already late later still);
+    # otherwise the current schedule stays. A later return would delay the truck's next
+    # load, so a shorter tour that ends later is not taken.
+    # O(I * S^2 + N*S), where I = optimizer iterations; S = number of stops
+    def optimize_schedule(self, graph, initial_vertex, end_vertex, start_time, visits):
+        packages_at = {}
+        deadlines = {}
+        for address, packages in visits:
+            if address not in packages_at:
+                packages_at[address] = []
+                deadlines[address] = 86399
+            packages_at[address] += packages
+            deadlines[address] = min([deadlines[address]] + [pkg.deadline for pkg in packages])
+        stops = list(packages_at)
+        order = optimize_tour(graph, initial_vertex, stops, end_vertex, start_time, self.SPEED, deadlines,
+                              self.optimizer_iterations, self.optimizer_time_limit)
+        if order == stops:
+            return
+        plan = self.plan_visits(graph, initial_vertex, end_vertex, start_time,
+                                [(address, packages_at[address]) for address in order])
+        itinerary, arrivals = plan[0], plan[1]
+        if itinerary.total_distance < self.itinerary.total_distance and itinerary.end_time <= self.end_time() and \
+                all(arrivals.get(package, 86399) <= max(package.deadline, package.arrival_time)
+                    for package in self.packages if package.deadline < 86399):
+            optimize_log = 'Tour optimized: truckID=%s, distance=%s [before=%s]'
+            logging.debug(optimize_log, self.id, itinerary.total_distance, self.itinerary.total_distance)
+            self.apply_plan(plan, start_time)
         return
 
     # Saves time of arrival for each particular location visited in a trip from
-    # one location to another; saves to truck's current travel schedule.
+    # one location to another; saves to the given travel schedule, and the new end time of
+    # each delivery passed through to times (see plan_visits).
+    # Each location is timed by its distance from the first location of the tour leg,
+    # scaled by the leg's travel_noise multiplier when one is set, and adds only its
+    # distance from the location before it to the schedule.
     # O(N), where N = number of locations in tour
-    def schedule_route(self, tour_leg):
+    def schedule_route(self, graph, itinerary, tour_leg, times):
+        noise = 1
+        if self.travel_noise is not None:
+            noise = self.travel_noise(tour_leg[0], tour_leg[-1])
+        leg_start = itinerary.end_time
+        travelled = 0
         for location in tour_leg:
-            leg_time = self.travel_time(location.distance)
-            location.arrival_time = leg_time + self.itinerary.end_time
-            self.itinerary.schedule_location(location)
+            leg_distance = shortest_distance(graph, tour_leg[0], location)
+            leg_time = self.travel_time(leg_distance) * noise
+            location.arrival_time = leg_time + leg_start
+            itinerary.schedule_location(location, leg_distance - travelled)
+            travelled = leg_distance
             if location in self.deliveries:
-                self.deliveries[location].end_time = min(location.arrival_time, self.deliveries[location].end_time)
-        return self.itinerary.end_time
+                delivery = self.deliveries[location]
+                delivery_start, delivery_end = times.get(delivery, (delivery.start_time, delivery.end_time))
+                times[delivery] = (delivery_start, min(location.arrival_time, delivery_end))
+        return itinerary.end_time
 
     # Provides estimation for time to perform delivery.
     # O(1)
     def travel_time(self, distance):
         return distance / self.SPEED * 3600  # Miles/(MPH)*(Seconds/Hour) = Seconds
 
-    # Schedule delivery for truck.
-    # O(1)
-    def schedule_delivery(self, delivery, end_time):
-        self.itinerary.schedule_delivery(delivery, end_time)
-        return
-
     # Determines locations truck will visit over a period of time and
     # adjusts package statuses and own package count as deliveries occur.
-    # O(N), where N = number of packages on truck (N <= 16)
+    # Packages are kept in arrival order, so those due by sec_count are a prefix of the
+    # list: the package store marks that prefix of the truck's rows delivered in one pass
+    # over its arrival and status columns, and the packages leave the truck in one slice.
+    # O(D), where D = number delivered
     def deliver_packages(self, sec_count):
         start = self.itinerary.start_time
-        delivery_batch = []
         time_active = sec_count - start
-        delivery_log = 'Simulating deliveries: truckID={}, start_time={}, active_time={}'
-        logging.debug(delivery_log.format(self.id, clock_time(sec_count), time_active))
-        self.update_stats(time_active)
-        for package in self.packages:
-            if package.arrival_time <= sec_count:
-                package.status = "Delivered"
-                self.package_count -= 1
-                delivery_batch.append(package)
-                log_str = 'Package delivered: package_id={}, address={}, arrival_time={} [{}]'
-                logging.info(log_str.format(package.id,
-                                            package.address.label,
-                                            package.arrival_time,
-                                            clock_time(package.arrival_time)))
-        for package in delivery_batch:
-            self.packages.remove(package)
-            self.deliveries.pop(package.address, None)
-        self.delivered += delivery_batch
+        if logging.root.isEnabledFor(logging.DEBUG):
+            delivery_log = 'Simulating deliveries: truckID=%s, start_time=%s, active_time=%s'
+            logging.debug(delivery_log, self.id, clock_time(sec_count), time_active)
+        self.update_stats(sec_count)
+        if self.rows is None:
+            self.sort_arrivals()  # O(N log N), only after packages changed outside scheduling
+        due = 0
+        if self.packages:
+            due = self.packages[0].store.mark_delivered(sec_count, self.rows)  # O(D)
+        delivery_batch = self.packages[:due]
+        if delivery_batch:
+            del self.packages[:due]
+            del self.rows[:due]
+            self.package_count -= due
+            log_deliveries = logging.root.isEnabledFor(logging.INFO)
+            for package in delivery_batch:
+                self.deliveries.pop(package.address, None)
+                if log_deliveries:
+                    log_str = 'Package delivered: package_id=%s, address=%s, arrival_time=%s [%s]'
+                    logging.info(log_str, package.id, package.address.label, package.arrival_time,
+                                 clock_time(package.arrival_time))
+            self.delivered += delivery_batch
+        stats = profiling.active
+        if stats is not None:
+            stats.count('deliver_packages')
+            if delivery_batch:
+                stats.count('deliver_packages.batches')
+                stats.count('deliver_packages.packages', len(delivery_batch))
         return
 
     # Returns location of truck at time of day (in seconds) and updates mileage.
-    # O(N), where N = total number of locations scheduled
-    def update_stats(self, time_active):
-        speed = self.SPEED / 3600  # miles per second
-        distance_lst = sorted(self.itinerary.locations.keys(), reverse=True)
-        cur_dist = 0
-        distance_travelled = int(time_active * speed)
-        last_dist = cur_dist
-        while cur_dist < distance_travelled:
-            if distance_lst:
-                last_dist = cur_dist
-                cur_dist = distance_lst.pop()
-                travel_log = 'Travelling to location: truckID={}, cur_location={}, cur_distance={}'
-                logging.debug(travel_log.format(self.id, self.itinerary.locations[cur_dist].label, cur_dist))
-            else:
-                break
-        if cur_dist > distance_travelled:
-            self.itinerary.next_location = self.itinerary.locations[cur_dist]
-            cur_dist = last_dist
-        self.trip_odometer = cur_dist
-        mileage_log = 'Updating mileage: truckID={}, new_dist={}, mileage={}'
-        logging.info(mileage_log.format(self.id, cur_dist, self.trip_odometer))
-        self.location = self.itinerary.locations[cur_dist]
+    # The truck is at the last stop it has reached; if it is on the road between stops,
+    # the stop it is heading to is saved as its next location.
+    # O(log N), where N = total number of locations scheduled
+    def update_stats(self, sec_count):
+        itinerary = self.itinerary
+        self.location, self.trip_odometer = itinerary.position_at(sec_count)
+        next_stop = itinerary.next_stop_after(sec_count)
+        if next_stop is not None and itinerary.arrival_times[itinerary.stop_index_at(sec_count)] != sec_count:
+            itinerary.next_location = next_stop[0]
+        if logging.root.isEnabledFor(logging.DEBUG):
+            travel_log = 'Travelling to location: truckID=%s, cur_location=%s, cur_distance=%s'
+            logging.debug(travel_log, self.id, self.location.label, self.trip_odometer)
+        mileage_log = 'Updating mileage: truckID=%s, new_dist=%s, mileage=%s'
+        logging.info(mileage_log, self.id, self.trip_odometer, self.trip_odometer)
+        stats = profiling.active
+        if stats is not None:
+            stats.count('update_stats')
         return
 
+    # Returns distance driven from the start of the day up to a time of day, over the
+    # current itinerary and every itinerary it replaced.
+    # O(log S), where S = number of locations in current itinerary
+    def distance_driven(self, sec_count):
+        return self.total_mileage + self.itinerary.position_at(sec_count)[1]
+
     # Getter for start time of truck's current itinerary.
     # O(1)
     def start_time(self):
@@ -170,26 +353,42 @@ class Truck:
 
     # String override for viewing details of truck.
     def __str__(self):
-        data = "\n" + "=-" * 68 + "=\n"
-        loc = 'Location'
-        data += "|\tTruck ID\t|\t{:<62}\t|\tPackage Count\t|\tTour Start\t|\tTour end\t|\tTour Mileage\n".format(loc)
-        row_format = "|\t{:<8}\t|\t{:<62}\t|\t{:<14}\t|\t{:<10}\t|\t{:<10}\t|\t{:<10}\n"
-        start = clock_time(self.itinerary.start_time)
-        end = clock_time(self.itinerary.end_time)
-        data += row_format.format(self.id, self.location.label, self.package_count, start, end, self.trip_odometer)
-        data += "|----Package List:" + "-" * 119 + "\n"
-        data += "|\tID\t|\t{:<70}\t|\tWeight\t|\tStatus\t\t|\tScheduled arrival\n".format('Address')
         packages = self.delivered + self.packages
         packages.sort(key=lambda pkg: pkg.arrival_time)
-        for package in packages:
-            data += str(package)
-            data += "=-" * 68 + "=\n"
-        return str(data)
+        package_rows = [str(package) for package in packages]
+        return truck_report(self.id, self.location.label, self.package_count, self.itinerary.start_time,
+                            self.itinerary.end_time, self.trip_odometer, package_rows)
+
+
+# Formats truck details followed by its package list, one formatted row per package.
+# O(N), where N = number of package rows
+def truck_report(t_id, location_label, package_count, start_time, end_time, trip_odometer, package_rows):
+    data = "\n" + "=-" * 68 + "=\n"
+    loc = 'Location'
+    data += "|\tTruck ID\t|\t{:<62}\t|\tPackage Count\t|\tTour Start\t|\tTour end\t|\tTour Mileage\n".format(loc)
+    row_format = "|\t{:<8}\t|\t{:<62}\t|\t{:<14}\t|\t{:<10}\t|\t{:<10}\t|\t{:<10}\n"
+    start = clock_time(start_time)
+    end = clock_time(end_time)
+    data += row_format.format(t_id, location_label, package_count, start, end, trip_odometer)
+    data += "|----Package List:" + "-" * 119 + "\n"
+    data += "|\tID\t|\t{:<70}\t|\tWeight\t|\tStatus\t\t|\tScheduled arrival\n".format('Address')
+    for row in package_rows:
+        data += row
+        data += "=-" * 68 + "=\n"
+    return str(data)
+
+
+# Ranks a plan (see Truck.plan_visits) for choosing between tours: number of packages
+# arriving after their deadline, then the time the truck gets back. Lower is better.
+# O(M), where M = number of packages planned
+def plan_rank(plan):
+    itinerary, arrivals = plan[0], plan[1]
+    late = sum(1 for package, arrival in arrivals.items() if arrival > package.deadline)
+    return late, itinerary.end_time
 
 
 # Provides route to hub from current location.
-# O(N^2) with dsp
+# O(N) with precomputed shortest paths
 def route_to_hub(graph, cur_vertex, hub_vertex):
-    dsp(graph, cur_vertex)
-    home_leg = shortest_tour(cur_vertex, hub_vertex)
+    home_leg = shortest_tour(graph, cur_vertex, hub_vertex)
     return home_leg
@@ -0,0 +1,45 @@
+# Michael Craig, 000955248
+
+
+# Partitions loads between trucks in one batch pass (cluster first, route second).
+# loads is a list of (vertex, package count, deadline); rooms is the free capacity of
+# each truck. Each truck is seeded with one load: the first with the load due soonest,
+# each next one with the load farthest from the seeds chosen so far, so clusters start
+# spread across the city. The remaining loads are then taken in deadline order, so the
+# most urgent get first pick of capacity, and each joins the nearest seed whose truck
+# still has room for it (the assignment step of capacitated k-medoids). A load that fits
+# no truck is left out.
+# Only one distance row per seed is read. Returns, per truck, the indexes of its loads.
+# O(K*L + L log L), where K = number of trucks; L = number of loads
+def cluster_loads(graph, loads, rooms):
+    rooms = list(rooms)
+    clusters = [[] for _ in rooms]
+    order = sorted(range(len(loads)), key=lambda i: (loads[i][2], i))
+    index = graph.vertex_index
+    seed_rows = []  # (truck, distance row of its seed)
+    nearest_seed = {i: float('inf') for i in order}  # distance from load to closest seed
+    for truck in sorted(range(len(rooms)), key=lambda t: -rooms[t]):
+        candidates = [i for i in order if i in nearest_seed and loads[i][1] <= rooms[truck]]
+        if not candidates:
+            continue
+        if not seed_rows:
+            seed = candidates[0]
+        else:
+            seed = max(candidates, key=lambda i: nearest_seed[i])
+        del nearest_seed[seed]
+        clusters[truck].append(seed)
+        rooms[truck] -= loads[seed][1]
+        row = graph.shortest_paths_from(loads[seed][0])[0]
+        seed_rows.append((truck, row))
+        for i in nearest_seed:
+            nearest_seed[i] = min(nearest_seed[i], row[index[loads[i][0]]])
+    for i in order:
+        if i not in nearest_seed:
+            continue
+        vertex_index = index[loads[i][0]]
+        fitting = [(row[vertex_index], truck) for truck, row in seed_rows if loads[i][1] <= rooms[truck]]
+        if fitting:
+            truck = min(fitting)[1]
+            clusters[truck].append(i)
+            rooms[truck] -= loads[i][1]
+    return clusters
@@ -0,0 +1,50 @@
+# Michael Craig, 000955248
+import importlib.machinery
+import importlib.util
+import os
+import shutil
+import sys
+import pytest
+
+
+# The modules import one another through the package name app, which the project is run
+# under; register this directory under that name so the tests can import them the same way.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+if 'app' not in sys.modules:
+    spec = importlib.machinery.ModuleSpec('app', None, is_package=True)
+    spec.submodule_search_locations = [ROOT]
+    sys.modules['app'] = importlib.util.module_from_spec(spec)
+
+
+# Package table and city graph of the sample day, loaded fresh for each test.
+@pytest.fixture
+def sample_day():
+    from app.csv_reader import load_package_csv, load_city_csv
+    return (load_package_csv(os.path.join(ROOT, 'WGUPS Package File.csv')),
+            load_city_csv(os.path.join(ROOT, 'WGUPS Distance Table.csv')))
+
+
+# Copies of the sample package and distance files in a scratch directory, for runs that
+# write a distance cache beside the table; returns (package file, distance file).
+@pytest.fixture
+def sample_files(tmp_path):
+    package_file = str(tmp_path / 'packages.csv')
+    distance_file = str(tmp_path / 'distances.csv')
+    shutil.copyfile(os.path.join(ROOT, 'WGUPS Package File.csv'), package_file)
+    shutil.copyfile(os.path.join(ROOT, 'WGUPS Distance Table.csv'), distance_file)
+    return package_file, distance_file
+
+
+# Road W3 - W2 - W1 - HUB - E1 - E2 - E3, one mile per road (200 seconds at 18 mph);
+# returns the graph and its vertices by label.
+@pytest.fixture
+def line_city():
+    from app.classes.city import Address, City
+    graph = City()
+    labels = ['W3', 'W2', 'W1', 'HUB', 'E1', 'E2', 'E3']
+    vertices = {label: Address(label) for label in labels}
+    for label in labels:
+        graph.add_address(vertices[label])
+    for left, right in zip(labels, labels[1:]):
+        graph.add_route(vertices[left], vertices[right])
+    return graph, vertices
@@ -1,74 +1,131 @@
 # Michael Craig, 000955248
 from .rh_table import RobinHoodHashTable
 from .classes.city import City, Address
+from .distance_cache import file_digest, cache_path, read_distance_cache, write_distance_cache
+import csv
+import logging
 
 
-# Load package list from CSV.
+# Load package list from CSV into the package hash table, keyed by package id;
+# see read_package_rows.
 # Runs with time complexity of O(N), where N = number of lines in file
-def load_package_csv(filename):
+def load_package_csv(filename, rejected=None):
     table = RobinHoodHashTable()
-    file = open(filename, "r")
-    lines = file.readlines()
-    for line in lines:
-        try:
-            p_id, address, city, state, p_zip, p_deadline, weight, note = line.split(",,,,,\n")[0].split(",")
-            if "EOD" not in p_deadline:
-                deadline_hour = p_deadline.split(":")[0]
-                deadline_min = p_deadline.split(":")[1].split(" ")[0]
-                p_deadline = (int(deadline_hour) * 3600 + int(deadline_min) * 60)
-            else:
-                p_deadline = 86399
-            table.insert(int(p_id), address, p_deadline, city, state, p_zip, weight, note)
-        except (ValueError, IndexError):
-            try:
-                p_id, address, city, state, p_zip, p_deadline, weight = line.split(',"')[0].split(',', 6)
-                note = line.split(',"')[1].split('",')[0]
-                if "EOD" not in p_deadline:
-                    hour = p_deadline.split(":")[0]
-                    minute = p_deadline.split(":")[1].split(" ")[0]
-                    p_deadline = (int(hour) * 3600 + int(minute) * 60)
-                else:
-                    p_deadline = 86399
-                table.insert(int(p_id), address, p_deadline, city, state, p_zip, weight, note)
-            except (ValueError, IndexError):
-                pass
+    for package in read_package_rows(filename, rejected):
+        table.insert(package[0], package)
     return table
 
 
-# Produces graph object from distance file.
+# Generator over package rows of a manifest, one row in memory at a time:
+# yields (id, address, deadline in seconds, city, state, zip, weight, note) tuples in
+# file order, ready for Hub.produce_packages. Blank rows and the title lines before the
+# "PackageID" header are skipped; any other row that cannot be read is rejected with
+# a warning naming its line, and appended as (line number, reason, row) to rejected
+# when a list is given. Quoted fields (notes containing commas) are handled by csv.
+# O(N), where N = number of lines in file
+def read_package_rows(filename, rejected=None):
+    seen_ids = set()
+    with open(filename, newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        in_preamble = True
+        for row in reader:
+            if not any(field.strip() for field in row):
+                continue
+            first_field = row[0].strip().strip('"')
+            if in_preamble:
+                if first_field == 'PackageID':
+                    in_preamble = False
+                    continue
+                if not first_field.isdigit():
+                    continue
+                in_preamble = False
+            try:
+                package = parse_package_row(row)
+                if package[0] in seen_ids:
+                    raise ValueError('duplicate package id {}'.format(package[0]))
+            except ValueError as error:
+                logging.warning('Rejected package row: line=%s, reason=%s', reader.line_num, error)
+                if rejected is not None:
+                    rejected.append((reader.line_num, str(error), row))
+                continue
+            seen_ids.add(package[0])
+            yield package
+    return
+
+
+# Converts a manifest row into a package tuple; raises ValueError describing the problem.
+# O(1)
+def parse_package_row(row):
+    if len(row) < 8:
+        raise ValueError('expected 8 fields, found {}'.format(len(row)))
+    p_id, address, city, state, p_zip, p_deadline, weight, note = row[:8]
+    if any(field.strip() for field in row[8:]):
+        raise ValueError('unexpected data after note column')
+    try:
+        p_id = int(p_id)
+    except ValueError:
+        raise ValueError('invalid package id {!r}'.format(p_id))
+    if not address:
+        raise ValueError('missing address')
+    return p_id, address, parse_deadline(p_deadline), city, state, p_zip, weight, note
+
+
+# Converts a deadline such as "10:30 AM" to seconds since midnight; EOD is end of day.
+# O(1)
+def parse_deadline(p_deadline):
+    if "EOD" in p_deadline:
+        return 86399
+    try:
+        deadline_hour, deadline_min = p_deadline.split(" ")[0].split(":")
+        return int(deadline_hour) * 3600 + int(deadline_min) * 60
+    except ValueError:
+        raise ValueError('invalid deadline {!r}'.format(p_deadline))
+
+
+# Produces graph object from distance file; precomputes all-pairs shortest paths
+# unless precompute is False, in which case paths are solved on demand and cached.
+# With use_cache, a binary copy of the parsed table and its shortest paths is kept
+# beside the CSV, keyed by a hash of the CSV's contents: a fresh cache is memory-mapped
+# instead of parsing and solving again, and a stale or missing one is rebuilt.
 # Runs with complexity of O(N*M), where N is number if lines and
-# M is number of addresses extracted from lines.
-def load_city_csv(filename):
-    graph = City()
-    file = open(filename, "r")
-    lines = file.readlines()
+# M is number of addresses extracted from lines; O(M^2) when read from cache.
+def load_city_csv(filename, precompute=True, route_cache_size=64, use_cache=False):
+    if use_cache:
+        digest = file_digest(filename)  # O(B), where B = size of file in bytes
+        graph = read_distance_cache(cache_path(filename), digest, precompute, route_cache_size)
+        if graph is not None:
+            return graph
+    graph = City(route_cache_size)
     address_lst = []
     count = 0
-    for line in lines:
-        if '","' in line:
-            address_string = line.split('," ')[1].split("\n")[0]
-            new_address = Address(address_string)
-            graph.add_address(new_address)
-            address_lst.append(new_address)
-            count += 1
-        elif "HUB" in line:
-            address_string = line.split('", ')[1].split(",0")[0]
-            new_address = Address(address_string)
-            graph.add_address(new_address)
-            address_lst.append(new_address)
-            count += 1
-        if line[0] == "(":
-            try:
-                # Reference last assigned new_address for current series of weights
-                weights = line.split('",')[1].split(",,")[0].split(",", count)
-                for address in address_lst:
-                    graph.add_route(address_lst[count - 1], address, round(float(weights[address_lst.index(address)]),
-                                                                           2))
-            except IndexError:
-                weights = line.split('",')[1].split(",", count)
-                for address in address_lst:
-                    graph.add_route(address_lst[count - 1], address, round(float(weights[address_lst.index(address)]),
-                                                                           2))
-        else:
-            pass
+    with open(filename, "r") as file:
+        for line in file:
+            if '","' in line:
+                address_string = line.split('," ')[1].split("\n")[0]
+                new_address = Address(address_string)
+                graph.add_address(new_address)
+                address_lst.append(new_address)
+                count += 1
+            elif "HUB" in line:
+                address_string = line.split('", ')[1].split(",0")[0]
+                new_address = Address(address_string)
+                graph.add_address(new_address)
+                address_lst.append(new_address)
+                count += 1
+            if line[0] == "(":
+                try:
+                    # Reference last assigned new_address for current series of weights
+                    weights = line.split('",')[1].split(",,")[0].split(",", count)
+                    for index, address in enumerate(address_lst):
+                        graph.add_route(address_lst[count - 1], address, round(float(weights[index]), 2))
+                except IndexError:
+                    weights = line.split('",')[1].split(",", count)
+                    for index, address in enumerate(address_lst):
+                        graph.add_route(address_lst[count - 1], address, round(float(weights[index]), 2))
+            else:
+                pass
+    if precompute:
+        graph.compute_shortest_paths()  # O(M^3 log M)
+        if use_cache:
+            write_distance_cache(cache_path(filename), digest, graph)  # O(M^2)
     return graph
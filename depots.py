@@ -0,0 +1,162 @@
+# Michael Craig, 000955248
+from app.csv_reader import load_package_csv, load_city_csv
+from app.main import run_day, mileage_estimate
+from app.rh_table import RobinHoodHashTable
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import logging
+import os
+
+
+# Graph loaded once by each worker process (see load_depot_graph).
+worker_graph = None
+
+
+# Splits a manifest of package tuples between depots (vertex labels of the city graph).
+# Packages that must travel together (bundles named in "Must be delivered with" notes,
+# and everything sharing an address with them) form one group, and each group goes to
+# the depot with the least total distance to its addresses, read from the distance
+# matrix rows of the depots. Ties go to the depot listed first.
+# Returns {depot label: [package tuples]}, with every depot present.
+# O(D*N + N*B), where D = number of depots; N = number of packages; B = packages per bundle note
+def assign_depots(graph, package_rows, depot_labels):
+    rows = {row[0]: row for row in package_rows}
+    groups = package_groups(rows)
+    depot_rows = [graph.shortest_paths_from(graph.get_vertex(label))[0] for label in depot_labels]
+    assignment = {label: [] for label in depot_labels}
+    for group in groups:
+        indexes = [graph.vertex_index[graph.get_vertex(rows[p_id][1])] for p_id in group]
+        costs = [sum(distances[index] for index in indexes) for distances in depot_rows]
+        nearest = costs.index(min(costs))
+        assignment[depot_labels[nearest]] += [rows[p_id] for p_id in group]
+    return assignment
+
+
+# Groups package ids that must stay at the same depot, using union-find over bundle notes
+# and shared addresses. Groups are listed in order of their first package.
+# O(N*B * a(N)), a = inverse Ackermann
+def package_groups(rows):
+    parent = {p_id: p_id for p_id in rows}
+
+    # O(a(N)) amortized
+    def find(p_id):
+        while parent[p_id] != p_id:
+            parent[p_id] = parent[parent[p_id]]
+            p_id = parent[p_id]
+        return p_id
+
+    first_at_address = {}
+    for p_id, row in rows.items():
+        address, note = row[1], row[7]
+        if address in first_at_address:
+            parent[find(p_id)] = find(first_at_address[address])
+        else:
+            first_at_address[address] = p_id
+        if "Must be delivered with " in note:
+            for other_id in note.split("Must be delivered with ")[1].split(", "):
+                if int(other_id) in parent:
+                    parent[find(int(other_id))] = find(p_id)
+    groups = {}
+    for p_id in rows:
+        groups.setdefault(find(p_id), []).append(p_id)
+    return list(groups.values())
+
+
+# Splits the manifest between depots and simulates each depot's day, with its own fleet,
+# in its own worker process; returns the merged fleet report (see merge_depot_results).
+# Workers map the distance cache written here instead of recomputing shortest paths.
+# max_workers=1 runs the depots in this process.
+# O(D*N + sum of depot runs / W), where W = number of workers
+def run_depots(package_file, distance_file, depot_labels, num_trucks=2, start_time=28800, capacity=16,
+               max_workers=None):
+    graph = load_city_csv(distance_file, use_cache=True)  # writes the cache if it is missing or stale
+    package_rows = load_package_csv(package_file).get_all()
+    assignment = assign_depots(graph, package_rows, depot_labels)
+    fleet = {'num_trucks': num_trucks, 'start_time': start_time, 'capacity': capacity}
+    tasks = [(label, assignment[label], fleet) for label in depot_labels]
+    workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+    if workers == 1:
+        load_depot_graph(distance_file)
+        try:
+            results = [simulate_depot(task) for task in tasks]
+        finally:
+            logging.disable(logging.NOTSET)
+    else:
+        with ProcessPoolExecutor(workers, initializer=load_depot_graph, initargs=(distance_file,)) as executor:
+            results = list(executor.map(simulate_depot, tasks))
+    return merge_depot_results(results)
+
+
+# Worker initializer: loads the cached graph and silences logging.
+# O(M^2), where M = number of addresses
+def load_depot_graph(distance_file):
+    global worker_graph
+    logging.disable(logging.CRITICAL)
+    worker_graph = load_city_csv(distance_file, use_cache=True)
+    return
+
+
+# Worker task: simulates one depot's day for its share of the manifest. Returns the
+# depot's record: package counts, estimated mileage, and each truck's return time and
+# package ids; or the error if the simulation rejected the depot's packages.
+# O(R), the cost of one run
+def simulate_depot(task):
+    label, package_rows, fleet = task
+    record = {'depot': label, 'packages': len(package_rows)}
+    if not package_rows:
+        record.update({'delivered': 0, 'late': 0, 'mileage': 0, 'trucks': []})
+        return record
+    pkg_lst = RobinHoodHashTable(len(package_rows))
+    for row in package_rows:
+        pkg_lst.insert(row[0], row)
+    try:
+        hub, trucks, _ = run_day(pkg_lst, worker_graph, 86399, num_trucks=fleet['num_trucks'],
+                                 start_time=fleet['start_time'], capacity=fleet['capacity'],
+                                 depot=worker_graph.get_vertex(label))
+    except ValueError as error:
+        record['error'] = str(error)
+        return record
+    record['delivered'] = hub.store.status_count('Delivered')
+    record['late'] = hub.store.late_count()
+    record['mileage'] = round(mileage_estimate(trucks, fleet['start_time']), 1)
+    record['trucks'] = [{'truck_id': truck.id,
+                         'end_time': truck.end_time(),
+                         'package_ids': sorted(package.id for package in truck.delivered + truck.packages)}
+                        for truck in trucks]
+    return record
+
+
+# Merges depot records into one fleet report: totals over all depots, every truck
+# labelled with its depot, and the depot records themselves.
+# O(D*T), where T = trucks per depot
+def merge_depot_results(results):
+    report = {'depots': results,
+              'packages': sum(result['packages'] for result in results),
+              'delivered': sum(result.get('delivered', 0) for result in results),
+              'late': sum(result.get('late', 0) for result in results),
+              'mileage': round(sum(result.get('mileage', 0) for result in results), 1),
+              'errors': [result['depot'] for result in results if 'error' in result],
+              'trucks': []}
+    for result in results:
+        for truck in result.get('trucks', []):
+            report['trucks'].append(dict(truck, depot=result['depot']))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Split the manifest between depots and simulate each one.')
+    parser.add_argument('--packages', default='WGUPS Package File.csv')
+    parser.add_argument('--distances', default='WGUPS Distance Table.csv')
+    parser.add_argument('--depot', action='append', dest='depots',
+                        help='depot address label as in the distance table; repeat for each depot (default: HUB)')
+    parser.add_argument('--trucks', type=int, default=2, help='trucks per depot')
+    parser.add_argument('--capacity', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per depot)')
+    parser.add_argument('--output', default='depot_results.json')
+    args = parser.parse_args()
+    fleet_report = run_depots(args.packages, args.distances, args.depots or ['HUB'], args.trucks,
+                              capacity=args.capacity, max_workers=args.workers)
+    with open(args.output, 'w') as output_file:
+        json.dump(fleet_report, output_file, indent=2)
+    print(json.dumps(fleet_report, indent=2))
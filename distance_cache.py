@@ -0,0 +1,121 @@
+# Michael Craig, 000955248
+from .classes.city import City, Address
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+
+# Cache layout, all values in native byte order:
+#   header      magic, byte order, SHA-256 of the source CSV, address count N, label bytes,
+#               padded to 56 bytes
+#   labels      address labels, newline separated, UTF-8, padded to 8 bytes
+#   weights     N*N float64 road lengths read from the CSV, row-major; inf where no road
+#   distances   N*N float64 all-pairs shortest distances, row-major
+#   predecessor N*N int32 all-pairs predecessor indexes, -1 for none
+MAGIC = b'WGUPSDT2'
+HEADER = struct.Struct('8s1s32sIIxxxx')  # a multiple of 8 bytes, like every block after it
+CACHE_SUFFIX = '.dtcache'
+
+
+# Returns SHA-256 digest of a file's contents.
+# O(B), where B = size of file in bytes
+def file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+# Returns name of cache file kept beside a distance table.
+# O(1)
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+
+# Loads graph from a cache file if it was built from a CSV with the given digest;
+# returns None when the cache is missing, stale, truncated, or from a machine of other
+# byte order.
+# The file is memory-mapped and the shortest path rows are read-only views into it,
+# so no distance is copied; roads are re-added from the weight block in CSV order.
+# O(N^2), where N = number of addresses
+def read_distance_cache(cache_file, digest, precompute=True, route_cache_size=64):
+    try:
+        with open(cache_file, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapped) < HEADER.size:
+        mapped.close()
+        return None
+    magic, byte_order, cached_digest, count, label_size = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or byte_order != sys.byteorder[0].encode() or cached_digest != digest:
+        mapped.close()
+        return None
+    cells = count * count
+    if len(mapped) != HEADER.size + padded(label_size) + cells * 20:
+        mapped.close()
+        return None
+    offset = HEADER.size
+    labels = mapped[offset:offset + label_size].decode('utf-8').split('\n')
+    offset += padded(label_size)
+    view = memoryview(mapped)
+    weights = view[offset:offset + cells * 8].cast('d')
+    offset += cells * 8
+    distances = view[offset:offset + cells * 8].cast('d')
+    offset += cells * 8
+    predecessors = view[offset:offset + cells * 4].cast('i')
+
+    graph = City(route_cache_size)
+    address_lst = []
+    for label in labels:
+        new_address = Address(label)
+        graph.add_address(new_address)
+        address_lst.append(new_address)
+    no_road = float('inf')
+    for row, from_address in enumerate(address_lst):
+        for column in range(row + 1):
+            weight = weights[row * count + column]
+            if weight != no_road:
+                graph.add_route(from_address, address_lst[column], weight)
+    if precompute:
+        graph.load_shortest_paths([distances[row * count:(row + 1) * count] for row in range(count)],
+                                  [predecessors[row * count:(row + 1) * count] for row in range(count)])
+    return graph
+
+
+# Writes graph's roads and all-pairs shortest paths to a cache file for a CSV digest.
+# The file is written under a temporary name and renamed, so readers never see a
+# partial cache.
+# O(N^2), where N = number of addresses
+def write_distance_cache(cache_file, digest, graph):
+    count = len(graph.vertices)
+    labels = '\n'.join(vertex.label for vertex in graph.vertices).encode('utf-8')
+    weights = array('d')
+    distances = array('d')
+    predecessors = array('i')
+    for row, from_address in enumerate(graph.vertices):
+        distance_row, predecessor_row = graph.shortest_paths_from(from_address)
+        for to_address in graph.vertices:
+            weights.append(graph.edge_weights.get((from_address, to_address), float('inf')))
+        distances.extend(distance_row)
+        predecessors.extend(predecessor_row)
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), digest, count, len(labels)))
+        file.write(labels)
+        file.write(b'\0' * (padded(len(labels)) - len(labels)))
+        weights.tofile(file)
+        distances.tofile(file)
+        predecessors.tofile(file)
+    os.replace(temp_file, cache_file)
+    return
+
+
+# Rounds a byte count up to a multiple of 8 so the float blocks stay aligned.
+# O(1)
+def padded(size):
+    return (size + 7) // 8 * 8
@@ -0,0 +1,88 @@
+# Michael Craig, 000955248
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+
+
+LOG_FORMAT = '[%(asctime)s] %(module)-10s %(levelname)-8s %(message)s'
+DATE_FORMAT = '%m-%d-%Y %I:%M:%S %p'
+CONSOLE_FORMAT = '%(name)-12s: %(levelname)-8s %(message)s'
+
+# QueueListener writing records handed off by the simulation thread, or None when
+# handlers write synchronously.
+listener = None
+
+
+# Writes each record as one compact JSON object: creation time, level, module, the
+# unformatted message template and its arguments. Messages are never interpolated,
+# so a journal line costs a JSON dump of a few scalars.
+class JournalFormatter(logging.Formatter):
+    # O(A), where A = number of message arguments
+    def format(self, record):
+        entry = {'t': round(record.created, 6),
+                 'level': record.levelname,
+                 'module': record.module,
+                 'msg': str(record.msg)}
+        if record.args:
+            entry['args'] = record.args
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+
+# Queue handler that passes records through untouched, leaving message formatting to the
+# listener thread. Log arguments must therefore be values that do not change after the
+# call (ids, strings, numbers); records carrying exceptions are formatted immediately.
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # O(1)
+    def prepare(self, record):
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+
+# Replaces the root logger's handlers with a log file (truncated) and an INFO console.
+# journal writes the file as JSON lines (see JournalFormatter) instead of free text.
+# use_queue sends records through a queue so formatting and file I/O happen on a
+# background listener thread; call stop_logging to flush it (also done at exit).
+# O(1)
+def configure_logging(filename='DeliveryScheduler.log', level=logging.DEBUG, use_queue=False, journal=False):
+    global listener
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+    file_handler = logging.FileHandler(filename, mode='w')
+    if journal:
+        file_handler.setFormatter(JournalFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    if use_queue:
+        records = queue.SimpleQueue()
+        root.addHandler(DeferredQueueHandler(records))
+        listener = logging.handlers.QueueListener(records, file_handler, console, respect_handler_level=True)
+        listener.start()
+    else:
+        root.addHandler(file_handler)
+        root.addHandler(console)
+    return
+
+
+# Stops the background listener, if any, after it writes every queued record.
+# O(Q), where Q = number of queued records
+def stop_logging():
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+    return
+
+
+atexit.register(stop_logging)
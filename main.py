@@ -1,26 +1,24 @@
 # Michael Craig, 000955248
 from app.csv_reader import load_package_csv, load_city_csv
 from app.trip_calc import shortest_distance
+from app.cluster_assign import cluster_loads
+from app.savings import savings_routes, chain_arrivals
 from app.classes.hub import Hub, to_sec, update_status
 from app.classes.truck import Truck
 from app.classes.package import clock_time
+from app.classes.timeline import Timeline
+from app import profiling
+from app.log_setup import configure_logging, stop_logging
+from app.classes.event_queue import EventQueue, EVENT_NAMES, PACKAGE_RECEIPT, CORRECTION, ARRIVAL, TRUCK_RETURN, \
+    DISPATCH
 import logging
 import os
+import sys
+import time
 
 
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-logging.basicConfig(level=logging.DEBUG,
-                    format='[%(asctime)s] %(module)-10s %(levelname)-8s %(message)s',
-                    datefmt='%m-%d-%Y %I:%M:%S %p',
-                    filename='DeliveryScheduler.log',
-                    filemode='w')
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-formatter = logging.Formatter('%(name)-12: %(levelname)-82 %(message)s')
-console.setFormatter(formatter)
-logging.getLogger('').addHandler(console)
-hub_logger = logging.getLogger('app.classes.hub')
+SEPARATOR = '=-' * 50 + '=\n'
+ASSIGNMENT_MODES = ('greedy', 'cluster', 'savings')
 
 
 # Render GUI
@@ -36,102 +34,417 @@ def generate_ui():
 
 # Runs simulation of hub activity, including shipping and receiving, truck scheduling,
 # processing changes to package data, and measuring truck statistics.
-# # O(N^2 * M^2), where N = number of packages; M = number of graph vertices.
-def simulate_deliveries(pkg_lst, graph, seconds_count):
-    hub = Hub(graph)
-    hub_vertex = graph.get_vertex('HUB')
+# Work happens only when an event fires: package receipts, corrections, truck arrivals
+# at scheduled locations, truck returns, and the opening dispatch. Each truck schedule
+# queues its own arrival and return events; events from a replaced schedule are skipped.
+# Trucks refine their greedy tours by local search when optimize_tours is set.
+# num_trucks trucks of the given capacity leave the hub from start_time on; the hub
+# sits at depot, the city's 'HUB' address unless another vertex is given.
+# assignment selects how waiting trucks are loaded: 'greedy' adds one package at a time
+# and replans after each (dispatch_trucks); 'cluster' splits the hub's packages between
+# the waiting trucks in one pass and plans each truck once (dispatch_clusters);
+# 'savings' loads trucks with Clarke-Wright routes and orders every tour by savings
+# too (dispatch_savings, Truck.savings_visits).
+# The flight due at 9:05 AM lands at receipt_time and the wrong address is corrected at
+# correction_time; travel_noise, if given, scales each leg's travel time (see Truck).
+# When record is set, every change is also written to a timeline for later status queries.
+# Generator: for each of the ascending stop_times, advances the simulation to that time
+# and yields the hub, the trucks as they stand at that time, and the timeline (or None).
+# O(E * (log E + T + L) + Q*T*N), where E = number of events; T = number of trucks;
+# L = cost of a loading session at the hub; Q = number of stop times
+def run_stages(pkg_lst, graph, stop_times, optimize_tours=False, record=False, num_trucks=2, start_time=28800,
+               capacity=16, receipt_time=32700, correction_time=37200, travel_noise=None, depot=None,
+               assignment='greedy'):
+    if assignment not in ASSIGNMENT_MODES:
+        raise ValueError('Unknown assignment mode: %s' % assignment)
+    dispatch = {'greedy': dispatch_trucks, 'cluster': dispatch_clusters, 'savings': dispatch_savings}[assignment]
+    hub = Hub(graph, depot)
+    hub_vertex = hub.depot
     hub.produce_packages(pkg_lst.get_all())  # O(N)
 
-    start_time = 28800
-    sim_time = start_time
-    num_trucks = 2
-    trucks = ready_trucks(hub_vertex, num_trucks, start_time)
+    trucks = ready_trucks(hub_vertex, num_trucks, start_time, optimize_tours, capacity, travel_noise)
+    if assignment == 'savings':
+        for truck in trucks:
+            truck.planner = 'savings'
     hub.process_package_states(trucks, start_time)
 
-    # Set state for receiving late packages
-    first_update = 32700
-    entered_a = False
-    # Set state for correcting invalid package data
-    second_update = 37200
-    entered_b = False
-
-    while sim_time < seconds_count:  # O(N^2 * M^2)
-        logging.info('Checking for updates...')
-        if sim_time >= first_update and not entered_a:
-            hub.receive_packages(first_update)  # O(N)
-            entered_a = True
-        if sim_time >= second_update and not entered_b:
-            hub.correct_package()  # O(1)
-            entered_b = True
-
-        if min(trucks, key=lambda trk: trk.end_time()).location == hub_vertex:  # O(N)
-            while len(hub.packages) > 0:  # O(N^2 * M(M-N))
-                next_truck = determine_truck(trucks)  # O(N)
-                start_time = next_start_time(next_truck, sim_time)  # O(1)
-                if len(next_truck.reserve) > 0:
-                    for package in next_truck.reserve:  # O(N)
-                        if package not in next_truck.packages:
-                            next_truck.add_package(package)
-                    for package in next_truck.packages:  # O(N)
-                        if package in next_truck.reserve:
-                            next_truck.reserve.remove(package)
-                    next_truck.schedule_deliveries(graph, hub_vertex, hub_vertex, start_time)  # O(N^2 * M^2)
-                next_package = hub.determine_package(next_truck)  # O(N)
-
-                package_count = hub.total_pkg_count(next_package)  # O(1)
-                if next_truck.package_count + package_count <= next_truck.capacity:
-                    hub.process_package(next_truck, next_package)  # O(N*M*P)
-                    load_log = 'Delivery loaded: packageID={}, truckID={}, start_time={}'
-                    logging.info(load_log.format(next_package.id, next_truck.id, clock_time(start_time)))
-                    start_time = next_start_time(next_truck, sim_time)
-                    next_truck.schedule_deliveries(graph, hub_vertex, hub_vertex, start_time)  # O(N^2 * M^2)
-                else:
-                    hub.packages.append(next_package)
-                    cur_count = next_truck.package_count
-                    load_log = 'Truck full: truck_id={} [package_count={}]'
-                    logging.info(load_log.format(next_truck.id, cur_count))
-                    break
-
-        for truck in trucks:  # O(N^2 * M)
-            truck.deliver_packages(sim_time)  # O(N) ; O(1) since truck never exceeds 16?
-            dist_to_hub = shortest_distance(graph, truck.location, hub_vertex)  # O(N^2)
-            next_delivery = shortest_distance(graph, truck.location, truck.next_location())  # O(N^2)
-            hub_dist_from = shortest_distance(graph, truck.next_location(), hub_vertex)  # O(N^2)
-            optimization_log = 'Optimization check: distance_to [hub={}, next_delivery={}, hub_from_delivery={}]'
-            logging.info(optimization_log.format(dist_to_hub, next_delivery, hub_dist_from))
-            worst_case_distance = next_delivery + hub_dist_from
-            if dist_to_hub < worst_case_distance:
-                if len(hub.packages) > 0:
-                    deadline = min(hub.packages, key=lambda pkg: pkg.deadline).deadline  # O(N)
-                    logging.debug('Earliest deadline at hub: deadline={}'.format(clock_time(deadline)))
-                    if deadline < truck.end_time() + truck.travel_time(worst_case_distance):
-                        recall_log = 'Recalling truck: truck_id={}, package_count={}, location={}'
-                        logging.info(recall_log.format(truck.id, truck.package_count, truck.location.label))
-                        recall_truck(hub, truck, sim_time)  # O(N)
-            truck.deliver_packages(sim_time)  # O(N)
-            separator = '=-' * 50 + '=\n'
-            logging.info(separator)
-        sim_time += 900
+    # Key under which the delayed packages wait in late_arrivals: the 9:05 AM time parsed
+    # from their "Delayed on flight" notes, not the receipt time being simulated
+    delayed_note_time = 32700
+    # Time for correcting invalid package data
+    second_update = correction_time
+
+    events = EventQueue()
+    events.push(receipt_time, PACKAGE_RECEIPT)
+    events.push(second_update, CORRECTION)
+    events.push(start_time, DISPATCH)
+    scheduled = {}  # truck: itinerary whose events are queued
+    schedule_truck_events(events, trucks, scheduled, start_time)
+    timeline = None
+    if record:
+        timeline = Timeline(start_time)
+        timeline.record(0, hub.pkg_id_table.values(), trucks)  # state before the first event; O(N)
+
+    for stop_time in stop_times:
+        while len(events) > 0 and events.next_time() <= stop_time:  # O(E * (log E + T + L))
+            sim_time, event_type, payload = events.pop()
+            if event_type in (ARRIVAL, TRUCK_RETURN):
+                truck, itinerary = payload
+                if truck.itinerary is not itinerary:
+                    continue
+            if logging.root.isEnabledFor(logging.INFO):
+                event_log = 'Processing event: type=%s, time=%s'
+                logging.info(event_log, EVENT_NAMES[event_type], clock_time(sim_time))
+            if event_type == PACKAGE_RECEIPT:
+                hub.receive_packages(delayed_note_time)  # O(N)
+            elif event_type == CORRECTION:
+                hub.correct_package()  # O(1)
+            elif event_type == ARRIVAL:
+                truck.deliver_packages(sim_time)  # O(D)
+                check_recall(hub, truck, sim_time)  # O(N)
+            elif event_type == TRUCK_RETURN:
+                truck.deliver_packages(sim_time)  # O(D)
+            if event_type in (PACKAGE_RECEIPT, CORRECTION):
+                for truck in trucks:  # O(T * N)
+                    truck.deliver_packages(sim_time)
+                    check_recall(hub, truck, sim_time)
+            dispatch(hub, trucks, sim_time)  # O(L)
+            schedule_truck_events(events, trucks, scheduled, sim_time)  # O(T * S log E)
+            if record:
+                timeline.record(sim_time, hub.pkg_id_table.values(), trucks)  # O(N)
+            logging.info(SEPARATOR)
+
+        for truck in trucks:  # O(T * N)
+            truck.deliver_packages(stop_time)  # O(D)
+        if record:
+            timeline.record(stop_time, hub.pkg_id_table.values(), trucks)  # O(N)
+        yield hub, trucks, timeline
+    return
+
+
+# Runs the simulation up to a time of day; returns the hub, the trucks as they stand
+# at seconds_count, and the timeline (or None). See run_stages.
+# O(E * (log E + T + L))
+def run_day(pkg_lst, graph, seconds_count, optimize_tours=False, record=False, num_trucks=2, start_time=28800,
+            capacity=16, receipt_time=32700, correction_time=37200, travel_noise=None, depot=None,
+            assignment='greedy'):
+    for hub, trucks, timeline in run_stages(pkg_lst, graph, [seconds_count], optimize_tours, record, num_trucks,
+                                            start_time, capacity, receipt_time, correction_time, travel_noise,
+                                            depot, assignment):
+        return hub, trucks, timeline
+
+
+# Runs the day up to a time of day and logs the status of every truck and package at that time.
+# With profile set, hot-path counters and timers are collected during the run and returned
+# as a SimulationStats object (print it for a table); with profile_file set, the run is
+# also recorded by cProfile and dumped to that file for pstats. Returns None otherwise.
+# num_trucks, start_time and capacity describe the fleet, and assignment selects how
+# trucks are loaded; see run_stages.
+# O(E * (log E + T + L)); see run_stages
+def simulate_deliveries(pkg_lst, graph, seconds_count, optimize_tours=False, profile=False, profile_file=None,
+                        num_trucks=2, start_time=28800, capacity=16, assignment='greedy'):
+    stats = None
+    if profile or profile_file is not None:
+        stats = profiling.start(use_cprofile=profile_file is not None)
+        run_start = time.perf_counter()
+    try:
+        hub, trucks, timeline = run_day(pkg_lst, graph, seconds_count, optimize_tours, num_trucks=num_trucks,
+                                        start_time=start_time, capacity=capacity, assignment=assignment)
+    finally:
+        if stats is not None:
+            stats.add_time('run_day', run_start)
+            profiling.stop()
+    if profile_file is not None:
+        stats.dump_profile(profile_file)
+    total_mileage = mileage_estimate(trucks, start_time)
+    logging.info('PACKAGE STATUS AT: %s', clock_time(seconds_count))
+    logging.debug('total_mileage=%s', total_mileage)
+    if logging.root.isEnabledFor(logging.INFO):
+        for truck in trucks:
+            logging.info(str(truck))
+    logging.info("TOTAL MILEAGE: %d\n" % total_mileage)
+    return stats
+
+
+# Makes one forward pass over the day and yields a status snapshot at each of the
+# query times, which must be in ascending order. See status_snapshot for its contents.
+# O(E * (log E + T + L) + Q*N), where Q = number of query times; N = number of packages
+def status_snapshots(pkg_lst, graph, query_times, optimize_tours=False):
+    query_times = list(query_times)
+    if any(query_times[i] > query_times[i + 1] for i in range(len(query_times) - 1)):
+        raise ValueError('Query times must be in ascending order')
+    start_time = 28800
+    stages = run_stages(pkg_lst, graph, query_times, optimize_tours)
+    for query_time, (hub, trucks, _) in zip(query_times, stages):
+        yield status_snapshot(hub, trucks, query_time, start_time)
+    return
+
+
+# Captures package and truck status at a time of day as plain values:
+# time, packages {package id: (status, scheduled arrival, truck id or None)},
+# trucks {truck id: (location label, package count, trip odometer)}, and mileage.
+# O(N + T), where N = number of packages; T = number of trucks
+def status_snapshot(hub, trucks, sec_count, start_time):
+    truck_of = {}
+    truck_states = {}
+    for truck in trucks:
+        for package in truck.delivered + truck.packages:
+            truck_of[package.id] = truck.id
+        truck_states[truck.id] = (truck.location.label, truck.package_count, truck.trip_odometer)
+    package_states = {}
+    for p_id, package in hub.pkg_id_table.items():
+        package_states[p_id] = (package.status, package.arrival_time, truck_of.get(p_id))
+    return {'time': sec_count,
+            'packages': package_states,
+            'trucks': truck_states,
+            'mileage': mileage_estimate(trucks, start_time)}
 
+
+# Mileage estimate used by status reports: time from start of day to the end of each
+# truck's current tour, at truck speed.
+# O(T), where T = number of trucks
+def mileage_estimate(trucks, start_time):
     active_time = 0
-    for truck in trucks:  # O(N^2)
-        truck.deliver_packages(sim_time)  # O(N)
+    for truck in trucks:
         active_time += truck.end_time() - start_time
-    total_mileage = active_time * .005  # miles per second
-    logging.info('PACKAGE STATUS AT: {}'.format(clock_time(seconds_count)))
-    logging.debug('sim_time={} [{}], total_mileage={}'.format(sim_time, clock_time(sim_time), total_mileage))
+    return active_time * .005  # miles per second
+
+
+# Distance driven by all trucks from the start of the day up to a time of day, in miles,
+# read from their itineraries (see Truck.distance_driven).
+# O(T log S), where T = number of trucks; S = locations per itinerary
+def total_distance(trucks, sec_count):
+    return sum(truck.distance_driven(sec_count) for truck in trucks)
+
+
+# Simulates the whole day once and returns its timeline, so status at any time of day
+# can be looked up without running the simulation again.
+# O(E * (log E + T + L + N)); see run_day
+def build_timeline(pkg_lst, graph, optimize_tours=False):
+    end_of_day = 86399
+    return run_day(pkg_lst, graph, end_of_day, optimize_tours, record=True)[2]
+
+
+# Logs the status of every truck and package at a time of day from a recorded timeline.
+# O(T * P log C), where T = number of trucks; P = packages per truck; C = changes per item
+def display_status(timeline, seconds_count):
+    logging.info('PACKAGE STATUS AT: %s', clock_time(seconds_count))
+    logging.info(timeline.report(seconds_count))
+    logging.info("TOTAL MILEAGE: %d\n" % timeline.total_mileage(seconds_count))
+    return
+
+
+# Loads trucks waiting at the hub until the hub runs out of packages, no truck
+# is waiting at the hub, or the selected truck is full. Once the hub is out of
+# packages, waiting trucks still holding packages kept back by a recall leave with them.
+# O(N^2 * M), where N = number of packages loaded; M = number of graph vertices
+def dispatch_trucks(hub, trucks, sim_time):
+    graph = hub.city_graph
+    hub_vertex = hub.depot
+    while len(hub.packages) > 0:
+        waiting = [truck for truck in trucks if at_hub(truck, hub_vertex, sim_time)]  # O(T)
+        if not waiting:
+            break
+        next_truck = determine_truck(waiting)  # O(T)
+        start_time = next_start_time(next_truck, sim_time)  # O(1)
+        if len(next_truck.reserve) > 0:
+            reload_reserve(next_truck, graph, hub_vertex, start_time)  # O(N)
+        next_package = hub.determine_package(next_truck)  # O(log N)
+
+        package_count = hub.total_pkg_count(next_package)  # O(1)
+        if next_truck.package_count + package_count <= next_truck.capacity:
+            hub.process_package(next_truck, next_package)  # O(N*M*P)
+            if logging.root.isEnabledFor(logging.INFO):
+                load_log = 'Delivery loaded: packageID=%s, truckID=%s, start_time=%s'
+                logging.info(load_log, next_package.id, next_truck.id, clock_time(start_time))
+            start_time = next_start_time(next_truck, sim_time)
+            next_truck.schedule_deliveries(graph, hub_vertex, hub_vertex, start_time)
+        else:
+            hub.packages.append(next_package)
+            cur_count = next_truck.package_count
+            load_log = 'Truck full: truck_id=%s [package_count=%s]'
+            logging.info(load_log, next_truck.id, cur_count)
+            break
+    if len(hub.packages) == 0:
+        for truck in trucks:  # O(T * N)
+            if len(truck.reserve) > 0 and at_hub(truck, hub_vertex, sim_time):
+                reload_reserve(truck, graph, hub_vertex, next_start_time(truck, sim_time))
+    return
+
+
+# Splits the packages waiting at the hub between the trucks waiting there in one batch
+# (see Hub.ready_loads and cluster_assign.cluster_loads) and plans each truck's tour
+# once, instead of replanning after every package as dispatch_trucks does. Trucks first
+# take back packages kept back by a recall. Bundles and addresses are never split;
+# truck restrictions are met when the hub assigns those packages before the day starts
+# and by the reserve after a recall.
+# O(K*L + N*M), where K = waiting trucks; L = loads; N = packages loaded; M = graph vertices
+def dispatch_clusters(hub, trucks, sim_time):
+    graph = hub.city_graph
+    hub_vertex = hub.depot
+    waiting = [truck for truck in trucks if at_hub(truck, hub_vertex, sim_time)]  # O(T)
+    for truck in waiting:
+        if len(truck.reserve) > 0:
+            reload_reserve(truck, graph, hub_vertex, next_start_time(truck, sim_time))  # O(N)
+    rooms = [truck.capacity - truck.package_count for truck in waiting]
+    if len(hub.packages) == 0 or max(rooms, default=0) <= 0:
+        return
+    loads = hub.ready_loads()  # O(N)
+    clusters = cluster_loads(graph, [load[1:] for load in loads], rooms)  # O(K*L)
+    for truck, cluster in zip(waiting, clusters):
+        if not cluster:
+            continue
+        start_time = next_start_time(truck, sim_time)
+        for load in cluster:
+            for package in loads[load][0]:
+                if package.status != "On truck":
+                    hub.process_package(truck, package)
+        if logging.root.isEnabledFor(logging.INFO):
+            cluster_log = 'Cluster loaded: truckID=%s, loads=%s, package_count=%s, start_time=%s'
+            logging.info(cluster_log, truck.id, len(cluster), truck.package_count, clock_time(start_time))
+        truck.schedule_deliveries(graph, hub_vertex, hub_vertex, start_time)
+    return
+
+
+# Loads the trucks waiting at the hub with Clarke-Wright savings routes built over the
+# hub's loads (see Hub.ready_loads and savings.savings_routes), with each load due by
+# its earliest deadline. Routes are handed out earliest deadline first, each to the
+# waiting truck with the most room left that can carry it and still reach the route's
+# stops in time after the addresses it already carries and the routes it already took
+# (no later than the route would alone, for stops it cannot reach in time anyway), so
+# a truck may take several; routes that no truck can take wait for the next dispatch.
+# Each loaded truck is then planned once, its tour ordered by savings as well
+# (Truck.savings_visits). Loads are listed in graph order of their address, so the
+# routes do not depend on set iteration order.
+# O(L*C + K*N log N + R*K*(L + N) + N*M), where L = loads; C = cost of savings_routes
+# per load; K = waiting trucks; N = packages on trucks; R = routes; M = graph vertices
+def dispatch_savings(hub, trucks, sim_time):
+    graph = hub.city_graph
+    hub_vertex = hub.depot
+    waiting = [truck for truck in trucks if at_hub(truck, hub_vertex, sim_time)]  # O(T)
+    for truck in waiting:
+        if len(truck.reserve) > 0:
+            reload_reserve(truck, graph, hub_vertex, next_start_time(truck, sim_time))  # O(N)
+    rooms = {truck: truck.capacity - truck.package_count for truck in waiting}
+    if len(hub.packages) == 0 or max(rooms.values(), default=0) <= 0:
+        return
+    loads = sorted(hub.ready_loads(), key=lambda load: (graph.vertex_index[load[1]], min(pkg.id for pkg in load[0])))
+    stops = [load[1:] for load in loads]
+    speed = waiting[0].SPEED
+    routes = savings_routes(graph, hub_vertex, stops, max(rooms.values()), sim_time, speed)
+    taken = {}  # truck: addresses it already carries, then the routes handed to it, in driving order
+    for truck in waiting:  # O(K*N log N)
+        carried = []
+        for package in sorted(truck.packages, key=lambda package: (package.arrival_time, package.id)):
+            if package.address not in carried:
+                carried.append(package.address)
+        taken[truck] = [list(range(len(stops), len(stops) + len(carried)))]
+        stops += [(address, 0, 86399) for address in carried]
+    loaded = []
+    for route in routes:  # O(R*K*(L + N))
+        size = sum(loads[load][2] for load in route)
+        alone = chain_arrivals(graph, hub_vertex, stops, [route], sim_time, speed)
+        fitting = []
+        for truck in waiting:
+            if rooms[truck] < size:
+                continue
+            chained = chain_arrivals(graph, hub_vertex, stops, taken[truck] + [route],
+                                     next_start_time(truck, sim_time), speed)
+            if all(chained[load] <= max(stops[load][2], alone[load]) for load in route):
+                fitting.append(truck)
+        if not fitting:
+            continue
+        truck = max(fitting, key=lambda candidate: rooms[candidate])
+        rooms[truck] -= size
+        taken[truck].append(route)
+        if truck not in loaded:
+            loaded.append(truck)
+        for load in route:
+            for package in loads[load][0]:
+                if package.status != "On truck":
+                    hub.process_package(truck, package)
+    for truck in loaded:
+        start_time = next_start_time(truck, sim_time)
+        if logging.root.isEnabledFor(logging.INFO):
+            route_log = 'Savings routes loaded: truckID=%s, package_count=%s, start_time=%s'
+            logging.info(route_log, truck.id, truck.package_count, clock_time(start_time))
+        truck.schedule_deliveries(graph, hub_vertex, hub_vertex, start_time)
+    return
+
+
+# Puts packages kept back by a recall onto the truck again and reschedules it.
+# O(N*M), where N = number of packages on truck; M = number of graph vertices
+def reload_reserve(truck, graph, hub_vertex, start_time):
+    for package in truck.reserve:  # O(N)
+        if package not in truck.packages:
+            truck.add_package(package)
+    for package in truck.packages:  # O(N)
+        if package in truck.reserve:
+            truck.reserve.remove(package)
+    truck.schedule_deliveries(graph, hub_vertex, hub_vertex, start_time)
+    return
+
+
+# Checks whether a truck is at the hub and has not left yet: either its tour is over,
+# or its tour starts at the hub no earlier than now.
+# O(1)
+def at_hub(truck, hub_vertex, sim_time):
+    if truck.end_time() <= sim_time:
+        return True
+    return truck.start_time() >= sim_time and truck.itinerary.starting_location is hub_vertex
+
+
+# Recalls a loaded truck on the road when returning to the hub now is shorter than
+# finishing its next delivery first and the earliest deadline at the hub would
+# otherwise be missed.
+# O(N), where N = remaining packages on truck
+def check_recall(hub, truck, sim_time):
+    if truck.end_time() <= sim_time or truck.package_count == 0:
+        return
+    graph = hub.city_graph
+    hub_vertex = hub.depot
+    dist_to_hub = shortest_distance(graph, truck.location, hub_vertex)  # O(1)
+    next_delivery = shortest_distance(graph, truck.location, truck.next_location())  # O(1)
+    hub_dist_from = shortest_distance(graph, truck.next_location(), hub_vertex)  # O(1)
+    optimization_log = 'Optimization check: distance_to [hub=%s, next_delivery=%s, hub_from_delivery=%s]'
+    logging.info(optimization_log, dist_to_hub, next_delivery, hub_dist_from)
+    worst_case_distance = next_delivery + hub_dist_from
+    if dist_to_hub < worst_case_distance:
+        if len(hub.packages) > 0:
+            deadline = hub.packages.earliest_deadline()  # O(log N)
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug('Earliest deadline at hub: deadline=%s', clock_time(deadline))
+            if deadline < truck.end_time() + truck.travel_time(worst_case_distance):
+                recall_log = 'Recalling truck: truck_id=%s, package_count=%s, location=%s'
+                logging.info(recall_log, truck.id, truck.package_count, truck.location.label)
+                recall_truck(hub, truck, sim_time)  # O(N)
+                truck.deliver_packages(sim_time)  # O(D)
+    return
+
+
+# Queues arrival and return events for every truck whose itinerary changed
+# since its events were last queued.
+# O(T * S log E), where T = number of trucks; S = locations left per itinerary; E = queued events
+def schedule_truck_events(events, trucks, scheduled, sim_time):
     for truck in trucks:
-        logging.info(truck)
-    logging.info("TOTAL MILEAGE: %d\n" % total_mileage)
+        itinerary = truck.itinerary
+        if scheduled.get(truck) is itinerary:
+            continue
+        scheduled[truck] = itinerary
+        for stop in itinerary.stops_between(sim_time, itinerary.end_time):
+            events.push(itinerary.arrival_times[stop], ARRIVAL, (truck, itinerary))
+        events.push(max(itinerary.end_time, sim_time), TRUCK_RETURN, (truck, itinerary))
     return
 
 
 # Produces truck objects for use in simulation.
 # O(N), where N = number of trucks
-def ready_trucks(cur_vertex, num_trucks, start_time):
+def ready_trucks(cur_vertex, num_trucks, start_time, optimize_tours=False, capacity=16, travel_noise=None):
     trucks = []
     for x in range(num_trucks):
-        new_truck = Truck(x + 1, cur_vertex)
+        new_truck = Truck(x + 1, cur_vertex, capacity)
+        new_truck.optimize_tours = optimize_tours
+        new_truck.travel_noise = travel_noise
         new_truck.itinerary.schedule_start(start_time)
         trucks.append(new_truck)
     return trucks
@@ -141,21 +454,23 @@ def ready_trucks(cur_vertex, num_trucks, start_time):
 # O(N), where N = number of trucks (min function iteration)
 def determine_truck(trucks):
     next_truck = min(trucks, key=lambda truck: truck.end_time())
-    logging.info('Truck selected: truckID={}, package_count={}'.format(next_truck.id, next_truck.package_count))
+    logging.info('Truck selected: truckID=%s, package_count=%s', next_truck.id, next_truck.package_count)
     return next_truck
 
 
-# Returns time value (in seconds) for when to schedule the start of a truck's tour.
+# Returns time value (in seconds) for when to schedule the start of a truck's tour:
+# the current tour's start if the truck is still being loaded, otherwise now.
 # O(1)
 def next_start_time(truck, cur_time):
     cur_start = truck.start_time()
     cur_end = truck.end_time()
-    schedule_start_log = 'Scheduling start time: truckID={}, prompt={}, start={}, end={}'
-    logging.info(schedule_start_log.format(truck.id, clock_time(cur_time), clock_time(cur_start), clock_time(cur_end)))
+    if logging.root.isEnabledFor(logging.INFO):
+        schedule_start_log = 'Scheduling start time: truckID=%s, prompt=%s, start=%s, end=%s'
+        logging.info(schedule_start_log, truck.id, clock_time(cur_time), clock_time(cur_start), clock_time(cur_end))
     if cur_end > cur_time:
         new_start_time = cur_start
     else:
-        new_start_time = cur_end
+        new_start_time = cur_time
     return new_start_time
 
 
@@ -165,7 +480,7 @@ def next_start_time(truck, cur_time):
 # O(N), where N = remaining packages on truck (N <= 16)
 def recall_truck(hub, truck, cur_time):
     g = hub.city_graph
-    hub_vertex = g.get_vertex('HUB')
+    hub_vertex = hub.depot
     returning_packages = []
     for package in truck.packages:
         package.arrival_time = 86399
@@ -173,7 +488,7 @@ def recall_truck(hub, truck, cur_time):
             if package not in truck.reserve:
                 truck.reserve.append(package)
                 update_status(package, 'On truck')
-        elif package in hub.statuses['Preassigned']:
+        elif package in hub.preassigned:
             if package not in truck.reserve:
                 truck.reserve.append(package)
                 update_status(package, 'On truck')
@@ -184,12 +499,10 @@ def recall_truck(hub, truck, cur_time):
                     update_status(package, 'At hub')
                     hub.packages.append(package)
     for package in returning_packages:
-        truck.packages.remove(package)
-        truck.package_count -= 1
+        truck.remove_package(package)
     for package in truck.reserve:
         if package in truck.packages:
-            truck.package_count -= 1
-            truck.packages.remove(package)
+            truck.remove_package(package)
     truck.schedule_deliveries(g, truck.location, hub_vertex, cur_time)
     return
 
@@ -202,9 +515,14 @@ def clear():
 
 # Main Program
 if __name__ == "__main__":
+    # --async-log writes the log from a background thread; --journal writes JSON lines instead of text.
+    write_journal = '--journal' in sys.argv
+    configure_logging('DeliveryScheduler.jsonl' if write_journal else 'DeliveryScheduler.log',
+                      use_queue='--async-log' in sys.argv, journal=write_journal)
     clear()
     package_table = load_package_csv('WGUPS Package File.csv')  # O(N)
-    city_graph = load_city_csv('WGUPS Distance Table.csv')  # O(N*M)
+    city_graph = load_city_csv('WGUPS Distance Table.csv', use_cache=True)  # O(N*M); O(M^2) from cache
+    day_timeline = build_timeline(package_table, city_graph)  # simulated once per input set
     while True:
         choice = generate_ui()
         if choice == "1":
@@ -212,7 +530,8 @@ if __name__ == "__main__":
             logging.info('Please enter time to view package status:\n')
             prompt = input()
             prompt_in_seconds = to_sec(prompt)
-            logging.debug('User input received: {} [{}]'.format(prompt, prompt_in_seconds))
-            simulate_deliveries(package_table, city_graph, prompt_in_seconds)
+            logging.debug('User input received: %s [%s]', prompt, prompt_in_seconds)
+            display_status(day_timeline, prompt_in_seconds)  # O(T * P log C)
         elif choice == "q":
+            stop_logging()
             break
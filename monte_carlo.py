@@ -0,0 +1,164 @@
+# Michael Craig, 000955248
+from app.csv_reader import load_city_csv
+from app.classes.hub import to_sec
+from app.main import run_day, total_distance
+from app import sweep
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import logging
+import os
+import random
+
+
+# Distributions sampled for each replication. A distribution is either a constant or a
+# tuple naming a random.Random method followed by its arguments, e.g. ('gauss', 32700, 600).
+#   receipt_time     when the delayed flight (due 9:05 AM) lands, in seconds
+#   correction_time  when the corrected address for package 9 comes in, in seconds
+#   travel_noise     multiplier on the travel time of each leg between two locations,
+#                    drawn once per leg per replication
+DEFAULT_DISTRIBUTIONS = {'receipt_time': ('triangular', 32400, 36300, 32700),
+                         'correction_time': ('triangular', 36000, 43200, 37200),
+                         'travel_noise': ('lognormvariate', 0, 0.1)}
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+# Travel time multipliers for one replication: each leg (from, to) gets its own draw
+# the first time it is driven and keeps it, so rescheduling a tour does not redraw
+# the roads it has already timed.
+class LegNoise:
+    def __init__(self, rng, distribution):
+        self.rng = rng
+        self.distribution = distribution
+        self.factors = {}  # (from vertex, to vertex): multiplier
+
+    # O(1)
+    def __call__(self, from_vertex, to_vertex):
+        leg = (from_vertex, to_vertex)
+        if leg not in self.factors:
+            self.factors[leg] = max(sample(self.rng, self.distribution), 0)
+        return self.factors[leg]
+
+
+# Draws a value from a distribution (see DEFAULT_DISTRIBUTIONS).
+# O(1)
+def sample(rng, distribution):
+    if isinstance(distribution, (int, float)):
+        return distribution
+    method, *arguments = distribution
+    return getattr(rng, method)(*arguments)
+
+
+# Runs replications of the day with sampled event times and travel noise, spread in
+# chunks over a pool of worker processes, and summarizes them (see summarize). Every
+# replication is seeded from seed and its own number, so a report can be reproduced
+# exactly whatever the number of workers. Distributions not given use the defaults.
+# max_workers=1 runs the replications in this process.
+# O(R * C / W), where R = replications; C = cost of one run; W = number of workers
+def run_monte_carlo(package_file, distance_file, replications=1000, seed=0, distributions=None, max_workers=None,
+                    num_trucks=2, start_time=28800, capacity=16):
+    distributions = dict(DEFAULT_DISTRIBUTIONS, **(distributions or {}))
+    fleet = {'num_trucks': num_trucks, 'start_time': start_time, 'capacity': capacity}
+    workers = max_workers or os.cpu_count() or 1
+    chunk_count = min(replications, 4 * workers)  # a few chunks per worker to even out run times
+    chunks = [(seed, range(chunk, replications, chunk_count), distributions, fleet) for chunk in range(chunk_count)]
+    load_city_csv(distance_file, use_cache=True)  # writes the cache if it is missing or stale
+    if workers == 1:
+        sweep.load_worker_inputs(package_file, distance_file)
+        try:
+            tallies = [run_replications(chunk) for chunk in chunks]
+        finally:
+            logging.disable(logging.NOTSET)
+    else:
+        with ProcessPoolExecutor(workers, initializer=sweep.load_worker_inputs,
+                                 initargs=(package_file, distance_file)) as executor:
+            tallies = list(executor.map(run_replications, chunks))
+    return summarize(tallies, replications, seed, distributions)
+
+
+# Worker task: runs the numbered replications of a chunk and returns their tally:
+# on-time counts per package id, miles driven in each replication (from the trucks'
+# itineraries, so travel noise changes it only through the routes taken), and
+# replications the simulation rejected.
+# O(K * C), where K = replications in chunk
+def run_replications(chunk):
+    seed, numbers, distributions, fleet = chunk
+    on_time = {}
+    mileages = []
+    errors = 0
+    for number in numbers:
+        rng = random.Random('{}:{}'.format(seed, number))
+        receipt_time = max(sample(rng, distributions['receipt_time']), 0)
+        correction_time = max(sample(rng, distributions['correction_time']), 0)
+        noise = LegNoise(rng, distributions['travel_noise'])
+        try:
+            hub, trucks, _ = run_day(sweep.worker_packages, sweep.worker_graph, 86399,
+                                     num_trucks=fleet['num_trucks'], start_time=fleet['start_time'],
+                                     capacity=fleet['capacity'], receipt_time=receipt_time,
+                                     correction_time=correction_time, travel_noise=noise)
+        except ValueError:
+            errors += 1
+            continue
+        for package in hub.pkg_id_table.values():
+            if package.id not in on_time:
+                on_time[package.id] = 0
+            if package.status == 'Delivered' and package.arrival_time <= package.deadline:
+                on_time[package.id] += 1
+        mileages.append(total_distance(trucks, 86399))
+    return on_time, mileages, errors
+
+
+# Combines chunk tallies into the report: probability of each package arriving by its
+# deadline, and percentiles and mean of the miles driven.
+# O(R log R + P*K), where P = number of packages; K = number of chunks
+def summarize(tallies, replications, seed, distributions):
+    on_time = {}
+    mileages = []
+    errors = 0
+    for chunk_on_time, chunk_mileages, chunk_errors in tallies:
+        for p_id, count in chunk_on_time.items():
+            on_time[p_id] = on_time.get(p_id, 0) + count
+        mileages += chunk_mileages
+        errors += chunk_errors
+    mileages.sort()
+    completed = len(mileages)
+    report = {'replications': replications,
+              'completed': completed,
+              'errors': errors,
+              'seed': seed,
+              'distributions': distributions,
+              'on_time_probability': {p_id: round(on_time[p_id] / completed, 4) for p_id in sorted(on_time)},
+              'mileage_percentiles': {},
+              'mileage_mean': None}
+    if completed:
+        report['mileage_percentiles'] = {'p{}'.format(q): round(percentile(mileages, q), 1) for q in PERCENTILES}
+        report['mileage_mean'] = round(sum(mileages) / completed, 1)
+    return report
+
+
+# Nearest-rank percentile of sorted values.
+# O(1)
+def percentile(sorted_values, q):
+    rank = max(1, -(-q * len(sorted_values) // 100))  # ceiling of q% of the count
+    return sorted_values[rank - 1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Estimate on-time probability per package over sampled days.')
+    parser.add_argument('--packages', default='WGUPS Package File.csv')
+    parser.add_argument('--distances', default='WGUPS Distance Table.csv')
+    parser.add_argument('--replications', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--distributions', type=json.loads, default=None,
+                        help='JSON object overriding DEFAULT_DISTRIBUTIONS, e.g. \'{"travel_noise": 1}\'')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--trucks', type=int, default=2)
+    parser.add_argument('--start-time', type=to_sec, default=28800, help='HH:MM')
+    parser.add_argument('--capacity', type=int, default=16)
+    parser.add_argument('--output', default='monte_carlo_results.json')
+    args = parser.parse_args()
+    mc_report = run_monte_carlo(args.packages, args.distances, args.replications, args.seed, args.distributions,
+                                args.workers, args.trucks, args.start_time, args.capacity)
+    with open(args.output, 'w') as output_file:
+        json.dump(mc_report, output_file, indent=2)
+    print(json.dumps(mc_report, indent=2))
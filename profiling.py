@@ -0,0 +1,73 @@
+# Michael Craig, 000955248
+import cProfile
+import pstats
+import time
+
+
+# Stats object collecting counters for the current run, or None when profiling is off.
+# Instrumented code checks this once per call, so a run without profiling pays only
+# for that check.
+active = None
+
+
+# Counters and cumulative timers for the simulation's hot paths. Each counter is
+# keyed by name; timers accumulate seconds under the same names.
+class SimulationStats:
+    def __init__(self):
+        self.counts = {}  # name: count
+        self.seconds = {}  # name: cumulative seconds
+        self.profile = None  # cProfile.Profile when a profile dump was requested
+
+    # Adds to a counter.
+    # O(1)
+    def count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+        return
+
+    # Adds time elapsed since start (a time.perf_counter reading) to a timer.
+    # O(1)
+    def add_time(self, name, start):
+        self.seconds[name] = self.seconds.get(name, 0) + time.perf_counter() - start
+        return
+
+    # Renders counters and timers as a table sorted by name.
+    # O(K log K), where K = number of counters
+    def table(self):
+        rows = ['{:<40}{:>12}{:>14}'.format('counter', 'count', 'seconds')]
+        for name in sorted(set(self.counts) | set(self.seconds)):
+            seconds = self.seconds.get(name)
+            seconds = '' if seconds is None else '{:.6f}'.format(seconds)
+            rows.append('{:<40}{:>12}{:>14}'.format(name, self.counts.get(name, ''), seconds))
+        return '\n'.join(rows)
+
+    # Writes collected cProfile data to a file readable by pstats.
+    # O(F), where F = number of profiled functions
+    def dump_profile(self, filename):
+        pstats.Stats(self.profile).dump_stats(filename)
+        return
+
+    def __str__(self):
+        return self.table()
+
+
+# Turns profiling on for subsequent calls; with use_cprofile, every function call is
+# also recorded by cProfile. Returns the stats object being filled.
+# O(1)
+def start(use_cprofile=False):
+    global active
+    active = SimulationStats()
+    if use_cprofile:
+        active.profile = cProfile.Profile()
+        active.profile.enable()
+    return active
+
+
+# Turns profiling off and returns the stats collected since start.
+# O(1)
+def stop():
+    global active
+    stats = active
+    active = None
+    if stats is not None and stats.profile is not None:
+        stats.profile.disable()
+    return stats
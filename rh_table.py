@@ -1,93 +1,198 @@
 # Michael Craig, 000955248
 
 
-# requires table to be less than half-full to guarantee finding open bucket
-def quad_hash(key, c1, c2, i, size):
-    return (hash(key) + c1 * i + c2 * i * i) % size
+# Fibonacci hashing: a key's hash is multiplied by 2^64 / golden ratio and its home
+# bucket is taken from the top bits of the product, which spreads runs of consecutive
+# ids (common for packages) across the whole table instead of packing them together.
+GOLDEN_RATIO_64 = 0x9E3779B97F4A7C15
+MASK_64 = (1 << 64) - 1
 
 
-# References assert object locations within table
-class EmptyBucket:
-    pass
+# Returns scrambled 64-bit hash of a key.
+# O(1)
+def mixed_hash(key):
+    return (hash(key) * GOLDEN_RATIO_64) & MASK_64
 
 
+# Hash table using Robin Hood linear probing.
+# Entries live in dense parallel arrays (keys, values, hashes) in insertion order;
+# the slot arrays hold, for each bucket, the index of the entry stored there and its
+# probe distance (how far the bucket is from the entry's home bucket), -1 marking an
+# empty bucket. An insert takes the bucket of any resident that is closer to its home
+# than the new entry is, so probe lengths stay short and even; a lookup stops as soon
+# as it meets a resident closer to home than the key would be. Removal shifts the
+# following run of displaced entries back one bucket instead of leaving tombstones,
+# and fills the hole in the dense arrays with the last entry. The slot arrays double
+# whenever the load factor would pass max_load.
 class RobinHoodHashTable:
-    def __init__(self, capacity=40):
-        self.EMPTY_SINCE_START = EmptyBucket()
-        self.EMPTY_AFTER_REMOVAL = EmptyBucket()
-        self.table = [self.EMPTY_SINCE_START] * int(capacity // .5)
-        self.C1 = 13
-        self.C2 = 3
-
-    # Places item into table
-    def insert(self, p_id, address, deadline, city, state, p_zip, weight, status):
-        probe_count = 0
-        bucket = quad_hash(p_id, self.C1, self.C2, probe_count, len(self.table))
-        while probe_count < len(self.table):
-            if isinstance(self.table[bucket], EmptyBucket):
-                self.table[bucket] = [(p_id, address, deadline, city, state, p_zip, weight, status), probe_count]
-                return
-            elif self.table[bucket][1] < probe_count:
-                temp = self.table[bucket][0]
-                self.table[bucket] = [(p_id, address, deadline, city, state, p_zip, weight, status), probe_count]
-                self.insert(temp)
-                return
-            probe_count += 1
-            bucket = quad_hash(p_id, self.C1, self.C2, probe_count, len(self.table))
-        raise ValueError
-
-    # Returns package from package table
-    def get(self, p_id, address, deadline, city, state, p_zip, weight, status):
-        count = 0
-        bucket = quad_hash(p_id, self.C1, self.C2, count, len(self.table))
-        while self.table[bucket] is not self.EMPTY_SINCE_START and count < len(self.table):
-            if not isinstance(self.table[bucket], EmptyBucket):
-                if self.table[bucket][0][0] == p_id:
-                    return self.table[bucket][0]
-            count += 1
-            bucket = quad_hash(p_id, self.C1, self.C2, count, len(self.table))
-        raise ValueError('Object does not exist: Key=%s' % str(p_id))
-
-    # Returns list of all objects in table
+    def __init__(self, capacity=40, max_load=0.8):
+        self.max_load = max_load
+        size = 8
+        while size * max_load < capacity:
+            size *= 2
+        self.slot_entries = [-1] * size
+        self.slot_distances = [0] * size
+        self.mask = size - 1
+        self.shift = 64 - (size.bit_length() - 1)
+        self.entry_keys = []
+        self.entry_values = []
+        self.entry_hashes = []  # mixed hashes
+
+    # Places item into table under key, replacing any value already stored for the key.
+    # O(1) expected; O(N) when the table grows
+    def insert(self, key, value):
+        slot = self.find_slot(key)
+        if slot >= 0:
+            self.entry_values[self.slot_entries[slot]] = value
+            return
+        if len(self.entry_keys) + 1 > self.max_load * len(self.slot_entries):
+            self.resize(len(self.slot_entries) * 2)
+        entry = len(self.entry_keys)
+        key_hash = mixed_hash(key)
+        self.entry_keys.append(key)
+        self.entry_values.append(value)
+        self.entry_hashes.append(key_hash)
+        self.place(entry, key_hash)
+        return
+
+    # Returns value stored for key.
+    # O(1) expected
+    def get(self, key):
+        slot = self.find_slot(key)
+        if slot < 0:
+            raise ValueError('Object does not exist: Key=%s' % str(key))
+        return self.entry_values[self.slot_entries[slot]]
+
+    # Removes key and its value from table.
+    # O(1) expected
+    def remove(self, key):
+        slot = self.find_slot(key)
+        if slot < 0:
+            raise ValueError('Object does not exist: %s' % key)
+        entry = self.slot_entries[slot]
+        self.shift_back(slot)
+        last = len(self.entry_keys) - 1
+        if entry != last:
+            # Move last entry into the hole and repoint its bucket.
+            self.slot_entries[self.find_slot(self.entry_keys[last])] = entry
+            self.entry_keys[entry] = self.entry_keys[last]
+            self.entry_values[entry] = self.entry_values[last]
+            self.entry_hashes[entry] = self.entry_hashes[last]
+        self.entry_keys.pop()
+        self.entry_values.pop()
+        self.entry_hashes.pop()
+        return
+
+    # Returns list of all values in table.
+    # O(N), where N = number of entries
     def get_all(self):
-        lst = []
-        for foo in self.table:
-            if isinstance(foo, EmptyBucket):
-                pass
-            else:
-                lst.append(foo[0])
-        return lst
-
-    # Removes package from package table
-    # use when updating packages or removing them from location's package tables
-    def remove(self, p_id, address, deadline, city, state, p_zip, weight, status):
-        count = 0
-        bucket = quad_hash(p_id, self.C1, self.C2, count, len(self.table))
-        while self.table[bucket] is not self.EMPTY_SINCE_START and count < len(self.table):
-            if not isinstance(self.table[bucket], EmptyBucket):
-                if self.table[bucket][0][0] == p_id:
-                    self.table[bucket] = self.EMPTY_AFTER_REMOVAL
-                    return
-            count += 1
-            bucket = quad_hash(p_id, self.C1, self.C2, count, len(self.table))
-        raise ValueError('Object does not exist: %s' % p_id)
+        return list(self.entry_values)
+
+    # Returns bucket holding key, or -1 if key is absent.
+    # O(1) expected
+    def find_slot(self, key):
+        key_hash = mixed_hash(key)
+        mask = self.mask
+        slot_entries = self.slot_entries
+        slot_distances = self.slot_distances
+        slot = key_hash >> self.shift
+        distance = 0
+        while True:
+            entry = slot_entries[slot]
+            if entry < 0 or slot_distances[slot] < distance:
+                return -1
+            if self.entry_hashes[entry] == key_hash and self.entry_keys[entry] == key:
+                return slot
+            slot = (slot + 1) & mask
+            distance += 1
+
+    # Stores entry index in the slot arrays, displacing residents closer to their home bucket.
+    # O(1) expected
+    def place(self, entry, key_hash):
+        mask = self.mask
+        slot_entries = self.slot_entries
+        slot_distances = self.slot_distances
+        slot = key_hash >> self.shift
+        distance = 0
+        while True:
+            if slot_entries[slot] < 0:
+                slot_entries[slot] = entry
+                slot_distances[slot] = distance
+                return
+            if slot_distances[slot] < distance:
+                entry, slot_entries[slot] = slot_entries[slot], entry
+                distance, slot_distances[slot] = slot_distances[slot], distance
+            slot = (slot + 1) & mask
+            distance += 1
+
+    # Empties a bucket and moves each displaced entry after it back by one bucket.
+    # O(1) expected
+    def shift_back(self, slot):
+        mask = self.mask
+        slot_entries = self.slot_entries
+        slot_distances = self.slot_distances
+        next_slot = (slot + 1) & mask
+        while slot_entries[next_slot] >= 0 and slot_distances[next_slot] > 0:
+            slot_entries[slot] = slot_entries[next_slot]
+            slot_distances[slot] = slot_distances[next_slot] - 1
+            slot = next_slot
+            next_slot = (slot + 1) & mask
+        slot_entries[slot] = -1
+        slot_distances[slot] = 0
+        return
+
+    # Rebuilds slot arrays at a new size from the stored hashes.
+    # O(N)
+    def resize(self, size):
+        self.slot_entries = [-1] * size
+        self.slot_distances = [0] * size
+        self.mask = size - 1
+        self.shift = 64 - (size.bit_length() - 1)
+        for entry, key_hash in enumerate(self.entry_hashes):
+            self.place(entry, key_hash)
+        return
+
+    # O(1) expected
+    def __getitem__(self, key):
+        return self.get(key)
+
+    # O(1) expected
+    def __contains__(self, key):
+        return self.find_slot(key) >= 0
+
+    # O(1)
+    def __len__(self):
+        return len(self.entry_keys)
+
+    # Iterates keys in insertion order (with removals filled from the end); never
+    # visits empty buckets.
+    # O(N)
+    def __iter__(self):
+        return iter(list(self.entry_keys))
+
+    # O(N)
+    def keys(self):
+        return list(self.entry_keys)
+
+    # O(N)
+    def values(self):
+        return list(self.entry_values)
+
+    # Returns (key, value) pairs.
+    # O(N)
+    def items(self):
+        return list(zip(self.entry_keys, self.entry_values))
 
     # Overload string for cleaner: print(hashtable)
     def __str__(self):
         s = "\n"
-        index = 0
-        for bucket in self.table:
-            if isinstance(bucket, EmptyBucket):
-                pass
-                # if bucket is self.EMPTY_SINCE_START: value = 'E/S'
-                # else: value = 'E/R'
-            else:
+        for index, entry in enumerate(self.slot_entries):
+            if entry >= 0:
                 s += "\t------------------------------------------------------------------\n"
                 s += "|{:2}:\n".format(index)
-                value = str(bucket[0])
+                value = str(self.entry_values[entry])
                 s += '{:^6}|\n'.format(value)
                 s += "\t------------------------------------------------------------------\n"
-            index += 1
         return s
 
 
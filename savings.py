@@ -0,0 +1,149 @@
+# Michael Craig, 000955248
+import heapq
+
+
+# Savings are listed only between each stop and this many of its nearest stops: a
+# saving is large only when the two stops are close, so pairs further apart seldom join.
+NEIGHBOURS = 100
+
+
+# Clarke-Wright savings construction of capacitated routes with time windows.
+# stops is a list of (vertex, size, deadline); every route starts at depot at
+# start_time and returns to it. Each stop begins on a route of its own; the saving of
+# serving stops i and j on one route instead of two is d(depot, i) + d(depot, j) - d(i, j).
+# The positive savings of each stop and its NEIGHBOURS nearest stops are heapified once
+# and popped largest first; a pair is joined
+# when i and j end different routes, the joined load fits capacity, and either
+# direction of the joined route reaches every stop by its deadline (a stop that cannot
+# be reached in time even on its own only has to be reached no later than that).
+# With chained set, the routes are instead driven one after another by a single truck,
+# in the order they are returned, without going back to the depot in between; a join
+# must then keep every stop of the whole chain no later than its deadline, or than its
+# arrival before the join when it was already late.
+# Popping stops once fewer than two route ends have room left, as no pair can join then.
+# Returns routes as lists of stop indexes in visiting order, earliest deadline first.
+# O(L^2 + L*K log L), where L = number of stops; K = NEIGHBOURS; chained adds O(L) per
+# join tried
+def savings_routes(graph, depot, stops, capacity, start_time, speed, chained=False):
+    index = graph.vertex_index
+    rows = [graph.shortest_paths_from(vertex)[0] for vertex, _, _ in stops]
+    depot_row = graph.shortest_paths_from(depot)[0]
+    to_depot = [depot_row[index[vertex]] for vertex, _, _ in stops]
+    seconds_per_mile = 3600 / speed
+    route_of = list(range(len(stops)))  # stop: id of its route
+    open_ends = {i for i in range(len(stops)) if stops[i][1] < capacity}  # ends of routes with room left
+    routes = {i: [i] for i in range(len(stops))}  # route id: stops in visiting order
+    loads = {i: stops[i][1] for i in range(len(stops))}  # route id: total size
+
+    # O(R), where R = stops on route
+    def route_key(route):
+        return min(stops[stop][2] for stop in route), route[0]
+
+    # Yields (stop, arrival time) for routes driven in the given order: each from the
+    # depot at start_time, or one after another when chained.
+    # O(L)
+    def arrivals(route_lst):
+        arrival, previous = start_time, None
+        for route in route_lst:
+            if not chained:
+                arrival, previous = start_time, None
+            for stop in route:
+                leg = to_depot[stop] if previous is None else rows[previous][index[stops[stop][0]]]
+                arrival += leg * seconds_per_mile
+                yield stop, arrival
+                previous = stop
+
+    # Latest allowed arrival of each stop: its deadline, or its arrival in route_lst if later.
+    # O(L)
+    def limits_for(route_lst):
+        limits = [deadline for _, _, deadline in stops]
+        for stop, arrival in arrivals(route_lst):
+            limits[stop] = max(limits[stop], arrival)
+        return limits
+
+    # O(L)
+    def on_time(route_lst):
+        return all(arrival <= limits[stop] for stop, arrival in arrivals(route_lst))
+
+    # Routes a joined route would be checked with.
+    # O(R log R), where R = number of routes
+    def with_route(joined, a, b):
+        if not chained:
+            return [joined]
+        return sorted([route for route_id, route in routes.items() if route_id != a and route_id != b] + [joined],
+                      key=route_key)
+
+    limits = limits_for(sorted(routes.values(), key=route_key))
+    columns = [index[vertex] for vertex, _, _ in stops]
+    paired = set()
+    savings = []
+    for i in range(len(stops)):
+        row = rows[i]
+        distances = [row[column] for column in columns]
+        nearest = range(len(stops))
+        if len(stops) > NEIGHBOURS + 1:
+            nearest = heapq.nsmallest(NEIGHBOURS + 1, nearest, key=distances.__getitem__)  # O(L log K)
+        for j in nearest:
+            pair = (min(i, j), max(i, j))
+            if i == j or pair in paired:
+                continue
+            paired.add(pair)
+            saving = to_depot[i] + to_depot[j] - distances[j]
+            if saving > 0:
+                savings.append((-saving,) + pair)
+    heapq.heapify(savings)  # O(L*K)
+    while savings and len(open_ends) > 1:
+        _, i, j = heapq.heappop(savings)
+        if i not in open_ends or j not in open_ends:
+            continue
+        a, b = route_of[i], route_of[j]
+        if a == b or loads[a] + loads[b] > capacity:
+            continue
+        route_a, route_b = routes[a], routes[b]
+        if route_a[-1] != i:
+            route_a = route_a[::-1]
+        if route_b[0] != j:
+            route_b = route_b[::-1]
+        joined = route_a + route_b
+        if not on_time(with_route(joined, a, b)):
+            joined.reverse()
+            if not on_time(with_route(joined, a, b)):
+                continue
+        routes[a] = joined
+        loads[a] += loads.pop(b)
+        del routes[b]
+        for stop in route_b:
+            route_of[stop] = a
+        open_ends.difference_update((route_a[0], route_a[-1], route_b[0], route_b[-1]))
+        if loads[a] < capacity:
+            open_ends.update((joined[0], joined[-1]))
+        if chained:
+            limits = limits_for(sorted(routes.values(), key=route_key))
+    return sorted(routes.values(), key=route_key)
+
+
+# Returns the arrival time at every stop of routes driven one after another from depot,
+# leaving at start_time without going back in between, as {stop index: arrival time}.
+# O(L), where L = number of stops on the routes
+def chain_arrivals(graph, depot, stops, routes, start_time, speed):
+    index = graph.vertex_index
+    seconds_per_mile = 3600 / speed
+    arrival_at = {}
+    arrival, vertex = start_time, depot
+    for route in routes:
+        for stop in route:
+            arrival += graph.shortest_paths_from(vertex)[0][index[stops[stop][0]]] * seconds_per_mile
+            vertex = stops[stop][0]
+            arrival_at[stop] = arrival
+    return arrival_at
+
+
+# Orders all stops of one truck into a single tour: the uncapacitated savings routes,
+# chained in the order savings_routes returns them, so every deadline is checked on
+# the tour's own clock.
+# O(L^2 * K), where L = number of stops; K = NEIGHBOURS
+def savings_tour(graph, depot, stops, start_time, speed):
+    tour = []
+    for route in savings_routes(graph, depot, stops, float('inf'), start_time, speed, chained=True):
+        tour += route
+    return tour
@@ -0,0 +1,110 @@
+# Michael Craig, 000955248
+from app.csv_reader import load_package_csv, load_city_csv
+from app.classes.hub import to_sec
+from app.main import run_day, mileage_estimate
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import itertools
+import json
+import logging
+import os
+
+
+# Package table and graph loaded once by each worker process (see load_worker_inputs).
+worker_packages = None
+worker_graph = None
+
+
+# Builds the scenarios for every combination of fleet size, start time and truck capacity.
+# O(A*B*C), the number of scenarios produced
+def scenario_grid(num_trucks=(2,), start_times=(28800,), capacities=(16,)):
+    return [{'num_trucks': trucks, 'start_time': start_time, 'capacity': capacity}
+            for trucks, start_time, capacity in itertools.product(num_trucks, start_times, capacities)]
+
+
+# Simulates a full day for every scenario across a pool of worker processes and returns
+# one result record per scenario, in scenario order (see run_scenario).
+# The distance table is parsed and its shortest paths cached to disk once, up front;
+# every worker then maps the same cache file instead of recomputing the paths, so the
+# graph's distance rows are shared between processes by the OS page cache.
+# max_workers=1 runs the scenarios in this process.
+# O(S * R / W), where S = number of scenarios; R = cost of one run; W = number of workers
+def run_sweep(package_file, distance_file, scenarios, max_workers=None, optimize_tours=False):
+    load_city_csv(distance_file, use_cache=True)  # writes the cache if it is missing or stale
+    scenarios = [dict(scenario, optimize_tours=optimize_tours) for scenario in scenarios]
+    if max_workers == 1:
+        load_worker_inputs(package_file, distance_file)
+        try:
+            return [run_scenario(scenario) for scenario in scenarios]
+        finally:
+            logging.disable(logging.NOTSET)
+    workers = max_workers or os.cpu_count() or 1
+    chunk_size = max(1, len(scenarios) // (4 * workers))  # a few chunks per worker to even out run times
+    with ProcessPoolExecutor(workers, initializer=load_worker_inputs,
+                             initargs=(package_file, distance_file)) as executor:
+        return list(executor.map(run_scenario, scenarios, chunksize=chunk_size))
+
+
+# Worker initializer: loads the package table and the cached graph, and silences logging
+# so workers do not write to the log files of the process that started them.
+# O(N + M^2), where N = number of packages; M = number of addresses
+def load_worker_inputs(package_file, distance_file):
+    global worker_packages, worker_graph
+    logging.disable(logging.CRITICAL)
+    worker_packages = load_package_csv(package_file)
+    worker_graph = load_city_csv(distance_file, use_cache=True)
+    return
+
+
+# Runs one scenario to the end of the day and returns its result record: the scenario
+# parameters, estimated total mileage, packages delivered after their deadline, packages
+# never delivered, and each truck's final return time (in truck id order). A scenario
+# the simulation rejects, e.g. one with fewer trucks than a package restriction names,
+# records the error instead.
+# O(R), the cost of one run
+def run_scenario(scenario):
+    record = {'num_trucks': scenario['num_trucks'],
+              'start_time': scenario['start_time'],
+              'capacity': scenario['capacity']}
+    try:
+        hub, trucks, _ = run_day(worker_packages, worker_graph, 86399, scenario.get('optimize_tours', False),
+                                 num_trucks=scenario['num_trucks'], start_time=scenario['start_time'],
+                                 capacity=scenario['capacity'])
+    except ValueError as error:
+        record['error'] = str(error)
+        return record
+    record['mileage'] = round(mileage_estimate(trucks, scenario['start_time']), 1)
+    record['late'] = hub.store.late_count()
+    record['undelivered'] = len(hub.store) - hub.store.status_count('Delivered')
+    record['end_times'] = [truck.end_time() for truck in trucks]
+    return record
+
+
+# Parses comma separated integers, e.g. "2,3,4".
+# O(K)
+def parse_ints(text):
+    return [int(value) for value in text.split(',')]
+
+
+# Parses comma separated times of day (HH:MM), e.g. "7:30,8:00", to seconds.
+# O(K)
+def parse_times(text):
+    return [to_sec(value) for value in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulate the day for every combination of fleet parameters.')
+    parser.add_argument('--packages', default='WGUPS Package File.csv')
+    parser.add_argument('--distances', default='WGUPS Distance Table.csv')
+    parser.add_argument('--trucks', type=parse_ints, default=[2], help='comma separated fleet sizes')
+    parser.add_argument('--start-times', type=parse_times, default=[28800], help='comma separated HH:MM')
+    parser.add_argument('--capacities', type=parse_ints, default=[16], help='comma separated truck capacities')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--optimize-tours', action='store_true')
+    parser.add_argument('--output', default='sweep_results.json')
+    args = parser.parse_args()
+    grid = scenario_grid(args.trucks, args.start_times, args.capacities)
+    sweep_results = run_sweep(args.packages, args.distances, grid, args.workers, args.optimize_tours)
+    with open(args.output, 'w') as output_file:
+        json.dump(sweep_results, output_file, indent=2)
+    print(json.dumps(sweep_results, indent=2))
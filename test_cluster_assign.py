@@ -0,0 +1,35 @@
+# Michael Craig, 000955248
+from app.cluster_assign import cluster_loads
+from app.main import run_day
+
+
+# The first seed is the load due soonest and the second the load farthest from it, so
+# each side of the hub ends up on its own truck.
+def test_clusters_split_by_side(line_city):
+    graph, at = line_city
+    loads = [(at['E1'], 1, 86399), (at['W3'], 1, 86399), (at['E3'], 1, 36000), (at['W1'], 1, 86399),
+             (at['E2'], 1, 86399), (at['W2'], 1, 86399)]
+    clusters = cluster_loads(graph, loads, [16, 16])
+    assert sorted(sorted(cluster) for cluster in clusters) == [[0, 2, 4], [1, 3, 5]]
+    assert clusters[0][0] == 2
+
+
+# A load that fits no truck's remaining room is left for a later dispatch.
+def test_clusters_respect_rooms(line_city):
+    graph, at = line_city
+    loads = [(at['E1'], 3, 86399), (at['E2'], 3, 86399), (at['W1'], 2, 86399), (at['W2'], 4, 86399)]
+    rooms = [5, 4]
+    clusters = cluster_loads(graph, loads, rooms)
+    for cluster, room in zip(clusters, rooms):
+        assert sum(loads[load][1] for load in cluster) <= room
+    assigned = sorted(load for cluster in clusters for load in cluster)
+    assert len(assigned) == len(set(assigned))
+    assert sum(loads[load][1] for load in assigned) == 9
+
+
+def test_sample_day_has_no_late_packages(sample_day):
+    packages, graph = sample_day
+    hub, trucks, _ = run_day(packages, graph, 86399, assignment='cluster')
+    delivered = hub.store.with_status('Delivered')
+    assert len(delivered) == 40
+    assert [pkg.id for pkg in delivered if pkg.arrival_time > pkg.deadline] == []
@@ -0,0 +1,64 @@
+# Michael Craig, 000955248
+from app.csv_reader import load_package_csv, read_package_rows
+import logging
+import pytest
+
+
+MANIFEST = '''\ufeffWGUPS Package File,,,,,,,
+,,,,,,,
+PackageID,Address,City,State,Zip,Delivery Deadline,Mass KILO,Special Notes
+1,195 W Oakland Ave,Salt Lake City,UT,84115,10:30 AM,21,
+2,2530 S 500 E,Salt Lake City,UT,84106,EOD,44,"Must be delivered with 1, 3"
+,,,,,,,
+x3,233 Canyon Rd,Salt Lake City,UT,84103,EOD,2,
+4,,Salt Lake City,UT,84103,EOD,2,
+5,380 W 2880 S,Salt Lake City,UT,84115,noon,9,
+6,410 S State St,Salt Lake City,UT,84111
+2,3060 Lester St,West Valley City,UT,84119,EOD,88,
+7,1060 Dalton Ave S,Salt Lake City,UT,84104,9:00 AM,88,,extra
+8,4300 S 1300 E,Millcreek,UT,84117,EOD,2,
+'''
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    filename = tmp_path / 'packages.csv'
+    filename.write_text(MANIFEST, encoding='utf-8')
+    return str(filename)
+
+
+# Title lines and blank rows are skipped; quoted notes keep their commas.
+def test_reads_valid_rows(manifest):
+    rows = list(read_package_rows(manifest))
+    assert [row[0] for row in rows] == [1, 2, 8]
+    assert rows[0] == (1, '195 W Oakland Ave', 37800, 'Salt Lake City', 'UT', '84115', '21', '')
+    assert rows[1][2] == 86399
+    assert rows[1][7] == 'Must be delivered with 1, 3'
+
+
+# Each bad row is rejected with its line number and reason, and logged as a warning;
+# a repeated id is rejected and the first row with that id kept.
+def test_rejects_bad_rows(manifest, caplog):
+    rejected = []
+    with caplog.at_level(logging.WARNING):
+        table = load_package_csv(manifest, rejected)
+    assert sorted(table.keys()) == [1, 2, 8]
+    assert table[2][1] == '2530 S 500 E'
+    assert [(line, reason) for line, reason, _ in rejected] == [
+        (7, "invalid package id 'x3'"),
+        (8, 'missing address'),
+        (9, "invalid deadline 'noon'"),
+        (10, 'expected 8 fields, found 5'),
+        (11, 'duplicate package id 2'),
+        (12, 'unexpected data after note column')]
+    assert rejected[0][2][0] == 'x3'
+    warnings = [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+    assert warnings[0] == "Rejected package row: line=7, reason=invalid package id 'x3'"
+    assert len(warnings) == 6
+
+
+# Without a rejected list the bad rows are only logged.
+def test_rejected_list_is_optional(manifest, caplog):
+    with caplog.at_level(logging.WARNING):
+        assert len(load_package_csv(manifest)) == 3
+    assert len(caplog.records) == 6
@@ -0,0 +1,58 @@
+# Michael Craig, 000955248
+from app import depots
+
+
+def row(p_id, address, note=''):
+    return p_id, address, 86399, 'City', 'UT', '84000', '1', note
+
+
+# Bundle notes and shared addresses join groups, also through one another; groups are
+# listed in order of their first package.
+def test_package_groups():
+    packages = [row(1, 'A'), row(2, 'B', 'Must be delivered with 4, 6'), row(3, 'C'), row(4, 'D'), row(5, 'A'),
+                row(6, 'E'), row(7, 'E'), row(8, 'F', 'Must be delivered with 99')]
+    rows = {package[0]: package for package in packages}
+    assert depots.package_groups(rows) == [[1, 5], [2, 4, 6, 7], [3], [8]]
+
+
+# Each group goes to the depot nearest to all of its addresses together, so a bundle
+# with a stop on each side of the hub stays on one depot. Packages 1, 2 and 5 are 7 miles
+# from either depot, and the tie goes to the depot listed first.
+def test_assign_depots_keeps_groups(line_city):
+    graph, _ = line_city
+    package_rows = [row(1, 'W3', 'Must be delivered with 2'), row(2, 'E1'), row(3, 'E3'), row(4, 'W1'),
+                    row(5, 'E1'), row(6, 'E2')]
+    assignment = depots.assign_depots(graph, package_rows, ['W2', 'E2'])
+    assert list(assignment) == ['W2', 'E2']
+    assert [package[0] for package in assignment['W2']] == [1, 2, 5, 4]
+    assert [package[0] for package in assignment['E2']] == [3, 6]
+    swapped = depots.assign_depots(graph, package_rows, ['E2', 'W2'])
+    assert [package[0] for package in swapped['E2']] == [1, 2, 5, 3, 6]
+
+
+def test_merge_depot_results():
+    results = [{'depot': 'A', 'packages': 3, 'delivered': 3, 'late': 1, 'mileage': 10.25,
+                'trucks': [{'truck_id': 1, 'end_time': 40000, 'package_ids': [1, 2, 3]}]},
+               {'depot': 'B', 'packages': 2, 'error': 'Package restricted to missing truck'},
+               {'depot': 'C', 'packages': 0, 'delivered': 0, 'late': 0, 'mileage': 0, 'trucks': []}]
+    report = depots.merge_depot_results(results)
+    assert (report['packages'], report['delivered'], report['late'], report['mileage']) == (5, 3, 1, 10.2)
+    assert report['errors'] == ['B']
+    assert report['trucks'] == [{'truck_id': 1, 'end_time': 40000, 'package_ids': [1, 2, 3], 'depot': 'A'}]
+    assert report['depots'] is results
+
+
+# Sample day split between the hub and a second depot: every package is delivered once,
+# and the packages bundled together on the sample day share a depot.
+def test_run_depots(sample_files):
+    report = depots.run_depots(*sample_files, ['HUB', '4300 S 1300 E'], max_workers=1)
+    assert report['errors'] == []
+    assert report['packages'] == report['delivered'] == 40
+    carried = {}
+    for truck in report['trucks']:
+        for p_id in truck['package_ids']:
+            assert p_id not in carried
+            carried[p_id] = truck['depot']
+    assert sorted(carried) == list(range(1, 41))
+    assert len({carried[p_id] for p_id in (13, 14, 15, 16, 19, 20)}) == 1
+    assert [result['depot'] for result in report['depots']] == ['HUB', '4300 S 1300 E']
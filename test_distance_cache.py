@@ -0,0 +1,71 @@
+# Michael Craig, 000955248
+from app.classes.city import City
+from app.csv_reader import load_city_csv
+from app.distance_cache import cache_path
+import os
+import shutil
+import pytest
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# Copy of the sample distance table in a scratch directory, so the cache is written there.
+@pytest.fixture
+def table_copy(tmp_path):
+    filename = str(tmp_path / 'distances.csv')
+    shutil.copyfile(os.path.join(ROOT, 'WGUPS Distance Table.csv'), filename)
+    return filename
+
+
+# Counts all-pairs solves; a graph read from a fresh cache needs none.
+@pytest.fixture
+def solves(monkeypatch):
+    calls = []
+    compute = City.compute_shortest_paths
+
+    def counted(graph):
+        calls.append(graph)
+        return compute(graph)
+    monkeypatch.setattr(City, 'compute_shortest_paths', counted)
+    return calls
+
+
+def assert_same_graph(graph, expected):
+    assert [vertex.label for vertex in graph.vertices] == [vertex.label for vertex in expected.vertices]
+    for vertex, expected_vertex in zip(graph.vertices, expected.vertices):
+        distances, predecessors = graph.shortest_paths_from(vertex)
+        expected_distances, expected_predecessors = expected.shortest_paths_from(expected_vertex)
+        assert list(distances) == list(expected_distances)
+        assert list(predecessors) == list(expected_predecessors)
+    assert sorted((a.label, b.label, weight) for (a, b), weight in graph.edge_weights.items()) == \
+        sorted((a.label, b.label, weight) for (a, b), weight in expected.edge_weights.items())
+
+
+# The first load solves and writes the cache; the second reads it back without solving
+# and matches a fresh parse of the CSV.
+def test_cache_round_trip(table_copy, solves):
+    built = load_city_csv(table_copy, use_cache=True)
+    assert os.path.exists(cache_path(table_copy))
+    assert len(solves) == 1
+    cached = load_city_csv(table_copy, use_cache=True)
+    assert len(solves) == 1
+    assert_same_graph(cached, built)
+    assert_same_graph(cached, load_city_csv(table_copy))
+
+
+# Editing the CSV changes its digest, so the old cache is ignored and rebuilt.
+def test_changed_csv_rebuilds(table_copy, solves):
+    old_graph = load_city_csv(table_copy, use_cache=True)
+    with open(table_copy, newline='') as file:
+        text = file.read()
+    assert '(84104)",7.2,' in text
+    with open(table_copy, 'w', newline='') as file:
+        file.write(text.replace('(84104)",7.2,', '(84104)",1.5,'))
+    graph = load_city_csv(table_copy, use_cache=True)
+    assert len(solves) == 2
+    assert graph.shortest_paths_from(graph.vertices[0])[0][1] == 1.5
+    assert old_graph.shortest_paths_from(old_graph.vertices[0])[0][1] == 7.2
+    assert_same_graph(graph, load_city_csv(table_copy))
+    assert_same_graph(load_city_csv(table_copy, use_cache=True), graph)
+    assert len(solves) == 3
@@ -0,0 +1,76 @@
+# Michael Craig, 000955248
+from app import log_setup
+import json
+import logging
+import pytest
+
+
+# Puts the root logger's handlers and level back after a test reconfigures logging.
+@pytest.fixture
+def restore_root():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    log_setup.stop_logging()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+# Records go through the deferred queue to the listener thread, and stop_logging writes
+# every queued record before it returns; each journal line holds the message template and
+# its arguments unformatted, except for a record carrying an exception, which the handler
+# formats before queueing it.
+def test_queued_journal_lines(tmp_path, restore_root):
+    path = tmp_path / 'journal.jsonl'
+    log_setup.configure_logging(str(path), use_queue=True, journal=True)
+    assert [type(handler) for handler in restore_root.handlers] == [log_setup.DeferredQueueHandler]
+    for p_id in range(200):
+        logging.debug('Package delivered: package_id=%s, address=%s', p_id, 'HUB')
+    try:
+        raise ValueError('bad row')
+    except ValueError:
+        logging.exception('Load failed: row=%s', 7)
+    log_setup.stop_logging()
+    assert log_setup.listener is None
+    with open(path) as journal:
+        entries = [json.loads(line) for line in journal]
+    assert len(entries) == 201
+    assert entries[0]['level'] == 'DEBUG'
+    assert entries[0]['module'] == 'test_log_setup'
+    assert entries[0]['msg'] == 'Package delivered: package_id=%s, address=%s'
+    assert [entry['args'] for entry in entries[:3]] == [[0, 'HUB'], [1, 'HUB'], [2, 'HUB']]
+    assert [entry['t'] for entry in entries] == sorted(entry['t'] for entry in entries)
+    assert entries[-1]['level'] == 'ERROR'
+    assert entries[-1]['msg'].startswith('Load failed: row=7')
+    assert 'ValueError: bad row' in entries[-1]['msg']
+    assert 'args' not in entries[-1]
+
+
+# Without the queue the file is written as text as each record is logged.
+def test_direct_text_log(tmp_path, restore_root):
+    path = tmp_path / 'run.log'
+    log_setup.configure_logging(str(path))
+    assert log_setup.listener is None
+    logging.info('Truck selected: truckID=%s', 2)
+    with open(path) as log:
+        assert log.read().rstrip().endswith('INFO     Truck selected: truckID=2')
+
+
+# Written directly, a journal line keeps the arguments of an exception record and puts
+# the traceback in its own field.
+def test_direct_journal_exception(tmp_path, restore_root):
+    path = tmp_path / 'journal.jsonl'
+    log_setup.configure_logging(str(path), journal=True)
+    try:
+        raise ValueError('bad row')
+    except ValueError:
+        logging.exception('Load failed: row=%s', 7)
+    with open(path) as journal:
+        entry = json.loads(journal.readline())
+    assert entry['msg'] == 'Load failed: row=%s'
+    assert entry['args'] == [7]
+    assert 'ValueError: bad row' in entry['exc']
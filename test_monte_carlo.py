@@ -0,0 +1,63 @@
+# Michael Craig, 000955248
+from app import monte_carlo, sweep
+import logging
+import pytest
+
+
+# Nearest rank: the smallest value with at least q% of the values at or below it.
+def test_percentile_nearest_rank():
+    values = [10, 20, 30, 40]
+    assert [monte_carlo.percentile(values, q) for q in (0, 5, 25, 26, 50, 75, 95, 100)] == \
+        [10, 10, 10, 20, 20, 30, 40, 40]
+    assert monte_carlo.percentile([7], 95) == 7
+
+
+def test_summarize_merges_chunks():
+    tallies = [({1: 2, 2: 1}, [12.5, 10.0], 0), ({1: 1, 2: 2}, [11.0], 1)]
+    report = monte_carlo.summarize(tallies, 4, 0, {})
+    assert (report['completed'], report['errors']) == (3, 1)
+    assert report['on_time_probability'] == {1: 1.0, 2: 1.0}
+    assert report['mileage_percentiles'] == {'p5': 10.0, 'p25': 10.0, 'p50': 11.0, 'p75': 12.5, 'p95': 12.5}
+    assert report['mileage_mean'] == 11.2
+
+
+def test_summarize_without_completed_runs():
+    report = monte_carlo.summarize([({}, [], 2)], 2, 0, {})
+    assert report['completed'] == 0
+    assert report['mileage_percentiles'] == {}
+    assert report['mileage_mean'] is None
+
+
+# Loads the worker inputs into this process and turns logging back on afterwards.
+@pytest.fixture
+def worker_inputs(sample_files):
+    sweep.load_worker_inputs(*sample_files)
+    yield sample_files
+    logging.disable(logging.NOTSET)
+
+
+# Every replication is seeded from the seed and its own number, so however the
+# replications are split into chunks (one chunk per worker or several), the report is
+# the same.
+def test_report_independent_of_chunks(worker_inputs):
+    distributions = dict(monte_carlo.DEFAULT_DISTRIBUTIONS)
+    fleet = {'num_trucks': 2, 'start_time': 28800, 'capacity': 16}
+    reports = []
+    for chunk_count in (1, 3):
+        chunks = [(5, range(chunk, 6, chunk_count), distributions, fleet) for chunk in range(chunk_count)]
+        tallies = [monte_carlo.run_replications(chunk) for chunk in chunks]
+        reports.append(monte_carlo.summarize(tallies, 6, 5, distributions))
+    assert reports[0] == reports[1]
+    assert reports[0]['completed'] == 6
+    assert len(set(reports[0]['mileage_percentiles'].values())) > 1
+    assert len(reports[0]['on_time_probability']) == 40
+    assert reports[0] == monte_carlo.run_monte_carlo(*worker_inputs, replications=6, seed=5, max_workers=1)
+
+
+# With every distribution fixed the replications are the plain sample day.
+def test_constant_distributions(worker_inputs):
+    constants = {'receipt_time': 32700, 'correction_time': 37200, 'travel_noise': 1}
+    report = monte_carlo.run_monte_carlo(*worker_inputs, replications=3, distributions=constants, max_workers=1)
+    assert report['completed'] == 3
+    assert set(report['on_time_probability'].values()) == {1.0}
+    assert len(set(report['mileage_percentiles'].values())) == 1
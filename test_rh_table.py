@@ -0,0 +1,55 @@
+# Michael Craig, 000955248
+from app.rh_table import RobinHoodHashTable
+import random
+import pytest
+
+
+# Checks every lookup path of the table against a dict holding the same entries.
+def assert_matches(table, expected):
+    assert len(table) == len(expected)
+    assert sorted(table) == sorted(expected)
+    assert sorted(table.items()) == sorted(expected.items())
+    assert sorted(table.get_all()) == sorted(expected.values())
+    for key, value in expected.items():
+        assert key in table
+        assert table.get(key) == value
+    occupied = [entry for entry in table.slot_entries if entry >= 0]
+    assert sorted(occupied) == list(range(len(expected)))
+
+
+# Random inserts, overwrites and removals over a small key space, so the table grows
+# several times and removals shift back runs of displaced entries.
+@pytest.mark.parametrize('seed', range(5))
+def test_table_matches_dict(seed):
+    rng = random.Random(seed)
+    table = RobinHoodHashTable(capacity=1)
+    expected = {}
+    for _ in range(3000):
+        key = rng.randrange(400)
+        if key in expected and rng.random() < 0.4:
+            table.remove(key)
+            del expected[key]
+            assert key not in table
+        else:
+            value = rng.randrange(50)
+            table.insert(key, value)
+            expected[key] = value
+    assert_matches(table, expected)
+
+
+def test_resize_keeps_entries():
+    table = RobinHoodHashTable(capacity=4)
+    for key in range(1000):
+        table.insert(key, str(key))
+    assert len(table.slot_entries) * table.max_load >= 1000
+    assert_matches(table, {key: str(key) for key in range(1000)})
+
+
+def test_missing_key_raises():
+    table = RobinHoodHashTable()
+    table.insert(1, 'a')
+    with pytest.raises(ValueError):
+        table.get(2)
+    with pytest.raises(ValueError):
+        table.remove(2)
+
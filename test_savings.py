@@ -0,0 +1,85 @@
+# Michael Craig, 000955248
+from app.classes.package_store import PackageStore
+from app.classes.truck import Truck, plan_rank
+from app.main import run_day, total_distance
+from app.savings import savings_routes, savings_tour, chain_arrivals
+import pytest
+
+
+def served(routes):
+    return sorted(stop for route in routes for stop in route)
+
+
+# Stops on one side join into one route; the two sides never share one, as that saves nothing.
+def test_routes_join_stops_on_each_side(line_city):
+    graph, at = line_city
+    stops = [(at[label], 1, 86399) for label in ('E1', 'W2', 'E3', 'W3', 'E2')]
+    routes = savings_routes(graph, at['HUB'], stops, 16, 28800, 18)
+    assert served(routes) == [0, 1, 2, 3, 4]
+    assert sorted(sorted(route) for route in routes) == [[0, 2, 4], [1, 3]]
+
+
+def test_routes_respect_capacity(line_city):
+    graph, at = line_city
+    stops = [(at[label], 2, 86399) for label in ('E1', 'E2', 'E3', 'W1', 'W2', 'W3')]
+    routes = savings_routes(graph, at['HUB'], stops, 4, 28800, 18)
+    assert served(routes) == list(range(6))
+    assert all(sum(stops[stop][1] for stop in route) <= 4 for route in routes)
+
+
+# E1 is due 200 seconds after the start, so it cannot wait behind E3 or W1 on a route;
+# the routes come back earliest deadline first.
+def test_routes_keep_deadlines(line_city):
+    graph, at = line_city
+    stops = [(at['E3'], 1, 86399), (at['E1'], 1, 29000), (at['W1'], 1, 86399)]
+    routes = savings_routes(graph, at['HUB'], stops, 16, 28800, 18)
+    assert routes[0][0] == 1
+    for route in routes:
+        arrivals = chain_arrivals(graph, at['HUB'], stops, [route], 28800, 18)
+        assert all(arrivals[stop] <= stops[stop][2] for stop in route)
+
+
+# In one truck's tour the routes follow one another without a trip back to the depot,
+# so each deadline is checked on that chained clock.
+def test_tour_keeps_chained_deadlines(line_city):
+    graph, at = line_city
+    stops = [(at['W3'], 1, 86399), (at['E2'], 1, 29400), (at['W1'], 1, 29800), (at['E3'], 1, 86399)]
+    tour = savings_tour(graph, at['HUB'], stops, 28800, 18)
+    assert sorted(tour) == [0, 1, 2, 3]
+    arrivals = chain_arrivals(graph, at['HUB'], stops, [tour], 28800, 18)
+    assert all(arrivals[stop] <= stops[stop][2] for stop in tour)
+
+
+# Planning a tour leaves the truck untouched; only applying the plan schedules it.
+def test_plan_leaves_truck_unchanged(line_city):
+    graph, at = line_city
+    store = PackageStore(graph)
+    truck = Truck(1, at['HUB'])
+    truck.planner = 'savings'
+    for p_id, label in enumerate(('E2', 'W1', 'E1'), 1):
+        truck.add_package(store.add(p_id, at[label], 86399, 'City', 'UT', '84000', '1', ''))
+    truck.schedule_deliveries(graph, at['HUB'], at['HUB'], 28800)
+    itinerary, mileage = truck.itinerary, truck.total_mileage
+    arrivals = [package.arrival_time for package in truck.packages]
+    visits = truck.greedy_visits(graph, at['HUB'])
+    plan = truck.plan_visits(graph, at['HUB'], at['HUB'], 28800, visits)
+    assert truck.itinerary is itinerary and truck.total_mileage == mileage
+    assert [package.arrival_time for package in truck.packages] == arrivals
+    assert plan_rank(plan) == (0, plan[0].end_time)
+    truck.apply_plan(plan, 28800)
+    assert truck.itinerary is plan[0]
+    assert [package.arrival_time for package in truck.packages] == sorted(plan[1].values())
+
+
+# Sample day in savings mode: no package late, and the same distance on every run.
+@pytest.mark.parametrize('num_trucks', [2, 3, 4])
+def test_sample_day_has_no_late_packages(sample_day, num_trucks):
+    packages, graph = sample_day
+    distances = set()
+    for _ in range(2):
+        hub, trucks, _ = run_day(packages, graph, 86399, num_trucks=num_trucks, assignment='savings')
+        delivered = hub.store.with_status('Delivered')
+        assert len(delivered) == 40
+        assert [pkg.id for pkg in delivered if pkg.arrival_time > pkg.deadline] == []
+        distances.add(total_distance(trucks, 86399))
+    assert len(distances) == 1
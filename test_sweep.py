@@ -0,0 +1,32 @@
+# Michael Craig, 000955248
+from app import sweep
+from app.distance_cache import cache_path
+import logging
+import os
+
+
+# One record per scenario in grid order; the one-truck scenarios cannot place the packages
+# restricted to truck 2, so they record the error instead of results.
+def test_sweep_records(sample_files):
+    grid = sweep.scenario_grid([1, 2], [28800, 30600], [16])
+    records = sweep.run_sweep(*sample_files, grid, max_workers=1)
+    assert [(record['num_trucks'], record['start_time'], record['capacity']) for record in records] == \
+        [(1, 28800, 16), (1, 30600, 16), (2, 28800, 16), (2, 30600, 16)]
+    for record in records[:2]:
+        assert list(record) == ['num_trucks', 'start_time', 'capacity', 'error']
+        assert 'truck' in record['error']
+    for record in records[2:]:
+        assert list(record) == ['num_trucks', 'start_time', 'capacity', 'mileage', 'late', 'undelivered',
+                                'end_times']
+        assert record['undelivered'] == 0
+        assert len(record['end_times']) == 2
+        assert min(record['end_times']) > record['start_time']
+    assert os.path.exists(cache_path(sample_files[1]))
+    assert logging.root.manager.disable == logging.NOTSET
+
+
+# A scenario gives the same record whenever it is run and whatever runs beside it.
+def test_sweep_repeats(sample_files):
+    grid = sweep.scenario_grid([2, 3], [28800], [16, 12])
+    records = sweep.run_sweep(*sample_files, grid, max_workers=1)
+    assert sweep.run_sweep(*sample_files, grid[::-1], max_workers=1) == records[::-1]
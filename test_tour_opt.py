@@ -0,0 +1,84 @@
+# Michael Craig, 000955248
+from app.classes.city import Address
+from app.classes.package_store import PackageStore
+from app.classes.truck import Truck
+from app.main import run_day
+from app.tour_opt import optimize_tour
+
+
+def tour_length(graph, start_vertex, order):
+    row_of = graph.shortest_paths_from
+    index = graph.vertex_index
+    length, previous = 0, start_vertex
+    for vertex in order + [start_vertex]:
+        length += row_of(previous)[0][index[vertex]]
+        previous = vertex
+    return length
+
+
+# A zigzag over the line is untangled into one sweep out and back.
+def test_optimize_shortens_tour(line_city):
+    graph, at = line_city
+    stops = [at[label] for label in ('E1', 'W1', 'E2', 'W2', 'E3', 'W3')]
+    deadlines = {stop: 86399 for stop in stops}
+    order = optimize_tour(graph, at['HUB'], stops, at['HUB'], 28800, 18, deadlines)
+    assert sorted(stop.label for stop in order) == sorted(stop.label for stop in stops)
+    assert tour_length(graph, at['HUB'], order) == 12
+    assert optimize_tour(graph, at['HUB'], stops, at['HUB'], 28800, 18, deadlines) == order
+
+
+# A stop that met its deadline in the starting order still meets it.
+def test_optimize_keeps_deadlines(line_city):
+    graph, at = line_city
+    stops = [at[label] for label in ('W1', 'E3', 'W3')]
+    deadlines = {at['W1']: 29000, at['E3']: 86399, at['W3']: 86399}
+    order = optimize_tour(graph, at['HUB'], stops, at['HUB'], 28800, 18, deadlines)
+    assert order[0] is at['W1']
+
+
+# Truck at the hub of the line city loaded with one package per (label, deadline).
+def loaded_truck(line_city, loads, optimize_tours=False):
+    graph, at = line_city
+    store = PackageStore(graph)
+    truck = Truck(1, at['HUB'])
+    truck.optimize_tours = optimize_tours
+    for p_id, (label, deadline) in enumerate(loads, 1):
+        truck.add_package(store.add(p_id, at[label], deadline, 'City', 'UT', '84000', '1', ''))
+    truck.schedule_deliveries(graph, at['HUB'], at['HUB'], 28800)
+    return truck
+
+
+# A leg through other addresses counts each road once: E3 is 3 miles out and 3 back.
+def test_schedule_counts_each_road_once(line_city):
+    truck = loaded_truck(line_city, [('E3', 86399)])
+    assert truck.itinerary.total_distance == 6
+    assert truck.packages[0].arrival_time == 28800 + 600
+    assert truck.end_time() == 28800 + 1200
+
+
+# With a spur S off E2, greedy goes to E3 and W3 first as they are due first and then
+# all the way back for S (18 miles); the optimizer visits S while in the east (14 miles)
+# and both deadlines are still met, so the truck takes the shorter tour.
+def test_optimizer_shortens_truck_schedule(line_city):
+    graph, at = line_city
+    at['S'] = Address('S')
+    graph.add_address(at['S'])
+    graph.add_route(at['E2'], at['S'])
+    loads = [('E3', 30000), ('W3', 31200), ('S', 86399)]
+    greedy = loaded_truck(line_city, loads)
+    optimized = loaded_truck(line_city, loads, optimize_tours=True)
+    assert greedy.itinerary.total_distance == 18
+    assert optimized.itinerary.total_distance == 14
+    assert optimized.end_time() < greedy.end_time()
+    assert [package.id for package in greedy.packages] == [1, 2, 3]
+    assert optimized.packages[-1].id == 2
+    assert all(package.arrival_time <= package.deadline for package in optimized.packages)
+
+
+# Sample day on the greedy planner with tours optimized: no package late.
+def test_sample_day_has_no_late_packages(sample_day):
+    packages, graph = sample_day
+    hub, trucks, _ = run_day(packages, graph, 86399, optimize_tours=True)
+    delivered = hub.store.with_status('Delivered')
+    assert len(delivered) == 40
+    assert [pkg.id for pkg in delivered if pkg.arrival_time > pkg.deadline] == []
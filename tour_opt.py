@@ -0,0 +1,89 @@
+# Michael Craig, 000955248
+import time
+
+
+# Local search over a delivery tour:
+# Starts from an existing stop order and repeatedly applies improving 2-opt moves
+# (reverse a run of stops) and Or-opt moves (relocate a run of one to three stops).
+# Each candidate's change in distance is computed in O(1) from the distance matrix;
+# only improving candidates pay the O(S) check that every stop which met its deadline
+# in the starting order still meets it, and that a stop already late is reached no
+# later than before. Search stops when a full pass finds no improvement, or when the
+# iteration budget runs out, or the time budget if one is given (time_limit in
+# seconds; results then depend on machine speed).
+# Assumes undirected roads (City.add_route), so a reversed run keeps its internal length.
+# O(I * S^2), where I = iterations allowed; S = number of stops
+def optimize_tour(graph, start_vertex, stops, end_vertex, start_time, speed, deadlines,
+                  max_iterations=50, time_limit=None):
+    if len(stops) < 2:
+        return list(stops)
+    tour = [start_vertex] + list(stops) + [end_vertex]
+    index = graph.vertex_index
+    rows = [graph.shortest_paths_from(vertex)[0] for vertex in tour]
+    row_of = {}
+    for position in range(len(tour)):
+        row_of[tour[position]] = rows[position]
+
+    def d(a, b):
+        return row_of[a][index[b]]
+
+    seconds_per_mile = 3600 / speed
+    limits = {}
+    arrival = start_time
+    for position in range(1, len(tour) - 1):
+        arrival += d(tour[position - 1], tour[position]) * seconds_per_mile
+        stop = tour[position]
+        limits[stop] = max(deadlines[stop], arrival)
+
+    def on_time(candidate):
+        arrival_time = start_time
+        for pos in range(1, len(candidate) - 1):
+            arrival_time += d(candidate[pos - 1], candidate[pos]) * seconds_per_mile
+            if arrival_time > limits[candidate[pos]]:
+                return False
+        return True
+
+    deadline = float('inf') if time_limit is None else time.perf_counter() + time_limit
+    last = len(tour) - 2  # position of final stop
+    for _ in range(max_iterations):
+        improved = False
+        # 2-opt: reverse tour[i..j]
+        for i in range(1, last):
+            for j in range(i + 1, last + 1):
+                delta = (d(tour[i - 1], tour[j]) + d(tour[i], tour[j + 1])
+                         - d(tour[i - 1], tour[i]) - d(tour[j], tour[j + 1]))
+                if delta < -1e-9:
+                    candidate = tour[:i] + tour[i:j + 1][::-1] + tour[j + 1:]
+                    if on_time(candidate):
+                        tour = candidate
+                        improved = True
+            if time.perf_counter() > deadline:
+                return tour[1:-1]
+        # Or-opt: move tour[i..i+k-1] between tour[j] and tour[j+1]
+        for k in (1, 2, 3):
+            for i in range(1, last - k + 2):
+                seg_first = tour[i]
+                seg_last = tour[i + k - 1]
+                before = tour[i - 1]
+                after = tour[i + k]
+                removal_gain = d(before, seg_first) + d(seg_last, after) - d(before, after)
+                for j in range(0, last + 1):
+                    if i - 1 <= j <= i + k - 1:
+                        continue
+                    delta = (d(tour[j], seg_first) + d(seg_last, tour[j + 1])
+                             - d(tour[j], tour[j + 1]) - removal_gain)
+                    if delta < -1e-9:
+                        segment = tour[i:i + k]
+                        remainder = tour[:i] + tour[i + k:]
+                        insert_at = j + 1 if j < i else j + 1 - k
+                        candidate = remainder[:insert_at] + segment + remainder[insert_at:]
+                        if on_time(candidate):
+                            tour = candidate
+                            improved = True
+                            break
+                if time.perf_counter() > deadline:
+                    return tour[1:-1]
+        if not improved:
+            break
+    return tour[1:-1]
+
@@ -1,53 +1,98 @@
 # Michael Craig, 000955248
+from app import profiling
+import heapq
+import time
 
 
 # Dijkstra's Algorithm:
-# Adds all possible routes to an unvisited queue from an
-# initial vertex, iterating through list of vertices to
-# determine potentially shorter routes to each other vertex.
-# O(N^2), where N = total number of locations in map (all vertices are connected via edges)
+# Pushes the start vertex onto a priority queue keyed by distance, then
+# repeatedly settles the closest unvisited vertex and relaxes the routes
+# leaving it. Results are returned as new distance and predecessor maps
+# keyed by vertex, so the graph's vertices are never modified and calls
+# do not interfere with one another. Ties settle in vertex insertion order.
+# O(E log N), where N = total number of locations in map; E = number of roads
 def dsp(g, start_vertex):
-    unvisited_queue = []
+    stats = profiling.active
+    if stats is not None:
+        start = time.perf_counter()
+    distance = {}
+    predecessor = {}
     for current_vertex in g.adjacency_lst:
-        current_vertex.distance = float('inf')
-        current_vertex.predecessor = None
-        unvisited_queue.append(current_vertex)
-    start_vertex.distance = 0
-    while len(unvisited_queue) > 0:
-        smallest_index = 0
-        for i in range(1, len(unvisited_queue)):
-            if unvisited_queue[i].distance < unvisited_queue[smallest_index].distance:
-                smallest_index = i
-        current_vertex = unvisited_queue.pop(smallest_index)
+        distance[current_vertex] = float('inf')
+        predecessor[current_vertex] = None
+    distance[start_vertex] = 0
+    visited = set()
+    priority_queue = [(0, g.vertex_index[start_vertex], start_vertex)]
+    while len(priority_queue) > 0:
+        current_distance, _, current_vertex = heapq.heappop(priority_queue)
+        if current_vertex in visited:
+            continue
+        visited.add(current_vertex)
         for adj_vertex in g.adjacency_lst[current_vertex]:
             edge_distance = g.edge_weights[(current_vertex, adj_vertex)]
-            alternative_total_distance = round(current_vertex.distance + edge_distance, 4)
-            if alternative_total_distance < adj_vertex.distance:
-                adj_vertex.distance = alternative_total_distance
-                adj_vertex.predecessor = current_vertex
-    return
+            alternative_total_distance = round(current_distance + edge_distance, 4)
+            if alternative_total_distance < distance[adj_vertex]:
+                distance[adj_vertex] = alternative_total_distance
+                predecessor[adj_vertex] = current_vertex
+                heapq.heappush(priority_queue, (alternative_total_distance, g.vertex_index[adj_vertex], adj_vertex))
+    if stats is not None:
+        stats.count('dsp')
+        stats.add_time('dsp', start)
+    return distance, predecessor
+
+
+# Runs Dijkstra's algorithm from a single vertex and flattens the resulting tree
+# into a distance row and a predecessor row, both indexed by the graph's vertex index.
+# Predecessors are stored as vertex indexes; -1 marks the root or an unreachable vertex.
+# O(E log N), where N = total number of locations in map; E = number of roads
+def shortest_path_tree(g, start_vertex):
+    distance, predecessor = dsp(g, start_vertex)
+    distances = []
+    predecessors = []
+    for vertex in g.vertices:
+        distances.append(distance[vertex])
+        if predecessor[vertex] is None:
+            predecessors.append(-1)
+        else:
+            predecessors.append(g.vertex_index[predecessor[vertex]])
+    return distances, predecessors
+
+
+# Builds one shortest path tree per vertex; row i of each matrix is the tree rooted at vertex i.
+# O(N * E log N), where N = total number of locations in map; E = number of roads
+def all_pairs_shortest_paths(g):
+    distance_matrix = []
+    predecessor_matrix = []
+    for start_vertex in g.vertices:
+        distances, predecessors = shortest_path_tree(g, start_vertex)
+        distance_matrix.append(distances)
+        predecessor_matrix.append(predecessors)
+    return distance_matrix, predecessor_matrix
 
 
 # Creates list of all visited vertices en route to a location
-# in order from last vertex to first; reverses order of list
-# before returning to caller.
+# in order from last vertex to first by walking the start vertex's
+# predecessor row; reverses order of list before returning to caller.
+# Raises ValueError when no road leads from the start to the location.
 # O(N), where N = number of vertices (leafs in tree) through tour (branch)
-def shortest_tour(start_vertex, end_vertex):
+def shortest_tour(graph, start_vertex, end_vertex):
+    predecessors = graph.shortest_paths_from(start_vertex)[1]
     path = []
-    current_vertex = end_vertex
-    while current_vertex is not start_vertex:
-        path.append(current_vertex)
-        current_vertex = current_vertex.predecessor
+    current_index = graph.vertex_index[end_vertex]
+    start_index = graph.vertex_index[start_vertex]
+    while current_index != start_index:
+        if current_index < 0:
+            raise ValueError('No route between locations: start=%s, end=%s' % (start_vertex.label, end_vertex.label))
+        path.append(graph.vertices[current_index])
+        current_index = predecessors[current_index]
     path.append(start_vertex)
     path = path[::-1]
     return path
 
 
-# Returns total distance over shortest tour by utilizing
-# Dijkstra's algorithm to produce the shortest path to a
-# node, then returning the distance to that node.
-# O(N^2) with dsp
+# Returns total distance over shortest tour by reading the
+# start vertex's row of the graph's distance matrix or cached tree.
+# O(1) once the start vertex's tree is available
 def shortest_distance(graph, start_vertex, end_vertex):
-    dsp(graph, start_vertex)
-    tour_leg = shortest_tour(start_vertex, end_vertex)
-    return tour_leg[-1].distance
+    distances = graph.shortest_paths_from(start_vertex)[0]
+    return distances[graph.vertex_index[end_vertex]]
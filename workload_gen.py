@@ -0,0 +1,159 @@
+# Michael Craig, 000955248
+import argparse
+import math
+import random
+
+
+# Notes understood by Hub.process_note; delayed packages must arrive at the fixed
+# receiving time used by the simulation (9:05 am).
+DELAYED_NOTE = 'Delayed on flight---will not arrive to depot until 9:05 am'
+WRONG_ADDRESS_NOTE = 'Wrong address listed'
+TRUCK_NOTE = 'Can only be on truck {}'
+BUNDLE_NOTE = 'Must be delivered with {}'
+# Hub.correct_package always moves package 9 to this address, so it must exist.
+CORRECTED_ADDRESS = '410 S State St'
+DEADLINES = ['9:00 AM', '10:30 AM', 'EOD', 'EOD', 'EOD']
+
+
+# Produces a synthetic city and package manifest in the same CSV layouts as
+# 'WGUPS Distance Table.csv' and 'WGUPS Package File.csv', so both load with
+# csv_reader unchanged. Addresses are random points on a grid of roughly
+# 20x20 miles; distances are straight-line, rounded to a tenth of a mile.
+# special_share is the fraction of packages given a note, split evenly between
+# delayed, bundled, truck-restricted and wrong-address packages.
+# O(A^2 + P), where A = number of addresses; P = number of packages
+def generate_workload(distance_file, package_file, num_addresses, num_packages, special_share=0.25,
+                      num_trucks=2, seed=0):
+    if num_addresses < 2:
+        raise ValueError('At least two addresses are required: num_addresses=%s' % num_addresses)
+    rng = random.Random(seed)
+    labels = address_labels(num_addresses - 1)
+    points = [(10.0, 10.0)] + [(rng.uniform(0, 20), rng.uniform(0, 20)) for _ in labels]
+    zips = ['84{:03d}'.format(rng.randint(100, 199)) for _ in labels]
+    write_distance_csv(distance_file, labels, zips, points)
+    rows = package_rows(rng, labels, zips, num_packages, special_share, num_trucks)
+    write_package_csv(package_file, rows)
+    return
+
+
+# Produces unique street addresses; the first is the one Hub.correct_package expects.
+# O(A)
+def address_labels(count):
+    labels = [CORRECTED_ADDRESS]
+    number = 100
+    while len(labels) < count:
+        label = '{} W {} S'.format(number, number * 3 % 9000 + 100)
+        if label not in labels:
+            labels.append(label)
+        number += 10
+    return labels[:count]
+
+
+# Writes lower-triangular distance table; row i lists distances to addresses 0..i,
+# the hub being address 0.
+# O(A^2)
+def write_distance_csv(filename, labels, zips, points):
+    width = len(labels) + 2
+    blank = ',' * width
+    with open(filename, 'w', newline='') as file:
+        file.write('\ufeff' + blank + '\r\n')
+        file.write(blank + '\r\n')
+        file.write(blank + '\r\n')
+        file.write(',WGUPS Distance Table' + ',' * (width - 1) + '\r\n')
+        file.write(blank + '\r\n')
+        file.write(',,NHP1 : WGUPS Routing Program' + ',' * (width - 2) + '\r\n')
+        file.write(blank + '\r\n')
+        file.write('"Western Governors University\n4001 South 700 East, \nSalt Lake City, UT 84107", HUB,0.0'
+                   + ',' * (width - 2) + '\r\n')
+        for row in range(1, len(points)):
+            weights = []
+            for column in range(row + 1):
+                weights.append('{:.1f}'.format(round(math.dist(points[row], points[column]), 1)))
+            label = labels[row - 1]
+            file.write('"Synthetic Stop {}\n {}"," {}\n({})",{}'.format(row, label, label, zips[row - 1],
+                                                                      ','.join(weights)))
+            file.write(',' * (width - row - 2) + '\r\n')
+    return
+
+
+# Builds package rows (id, address, city, state, zip, deadline, weight, note).
+# The hub treats every package at an address alike when it delays, preassigns or
+# corrects one of them, so each delayed, truck-restricted and wrong-address package,
+# and each bundle with its two partners, gets an address of its own. At most half the
+# addresses are set aside this way; special packages that would not fit are left plain.
+# Package 9 is a wrong-address package whenever any are requested, since it is the
+# only package the simulation corrects; other wrong-address packages stay undelivered.
+# O(P + A)
+def package_rows(rng, labels, zips, num_packages, special_share, num_trucks):
+    special_addresses = list(range(1, len(labels)))
+    rng.shuffle(special_addresses)
+    special_addresses = special_addresses[:len(labels) // 2]
+    plain_addresses = [index for index in range(len(labels)) if index not in special_addresses]
+    rows = []
+    for p_id in range(1, num_packages + 1):
+        index = rng.choice(plain_addresses)
+        rows.append([p_id, labels[index], 'Salt Lake City', 'UT', zips[index], rng.choice(DEADLINES),
+                     rng.randint(1, 90), ''])
+    quota = int(num_packages * special_share) // 4
+    unassigned = list(range(num_packages))
+    rng.shuffle(unassigned)
+    if quota > 0 and num_packages >= 9:
+        unassigned.remove(8)
+        unassigned.append(8)
+    for kind in ['wrong', 'delayed', 'truck', 'bundled']:
+        for _ in range(quota):
+            group_size = 3 if kind == 'bundled' else 1
+            if not special_addresses or len(unassigned) < group_size:
+                break
+            index = special_addresses.pop()
+            group = [rows[unassigned.pop()] for _ in range(group_size)]
+            for row in group:
+                row[1] = labels[index]
+                row[4] = zips[index]
+            if kind == 'wrong':
+                group[0][7] = WRONG_ADDRESS_NOTE
+            elif kind == 'delayed':
+                group[0][7] = DELAYED_NOTE
+            elif kind == 'truck':
+                group[0][7] = TRUCK_NOTE.format(rng.randint(1, num_trucks))
+            else:
+                partners = sorted(row[0] for row in group[1:])
+                group[0][7] = BUNDLE_NOTE.format(', '.join(str(p_id) for p_id in partners))
+    return rows
+
+
+# Writes package manifest with the same header and trailing columns as the sample file;
+# notes containing commas are quoted.
+# O(P)
+def write_package_csv(filename, rows):
+    blank = ',' * 12
+    with open(filename, 'w', newline='') as file:
+        file.write('\ufeff' + blank + '\r\n')
+        file.write(blank + '\r\n')
+        file.write(blank + '\r\n')
+        file.write('WGUPS Package File' + blank + '\r\n')
+        file.write(blank + '\r\n')
+        file.write('NHP1 : WGUPS Routing Program' + blank + '\r\n')
+        file.write(blank + '\r\n')
+        file.write('"PackageID",Address,City ,State,Zip,"DeliveryDeadline","MassKILO",'
+                   'page 1 of 1PageSpecial Notes,,,,,\r\n')
+        for p_id, address, city, state, p_zip, deadline, weight, note in rows:
+            if ',' in note:
+                note = '"{}"'.format(note)
+            file.write('{},{},{},{},{},{},{},{},,,,,\r\n'.format(p_id, address, city, state, p_zip, deadline,
+                                                                 weight, note))
+    return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write a synthetic distance table and package file.')
+    parser.add_argument('distance_file')
+    parser.add_argument('package_file')
+    parser.add_argument('--addresses', type=int, default=27)
+    parser.add_argument('--packages', type=int, default=40)
+    parser.add_argument('--special-share', type=float, default=0.25)
+    parser.add_argument('--trucks', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate_workload(args.distance_file, args.package_file, args.addresses, args.packages,
+                      args.special_share, args.trucks, args.seed)